@@ -0,0 +1,51 @@
+# File: benchmark.py
+import argparse
+import os
+import random
+import tempfile
+import time
+from storage import SQLiteRepository, SharedMemoryRepository, MemoryRepository
+
+
+def run_scenario(repository, rng, item_count=20):
+    """Creates a small shop, then sells, restocks, searches and reads the dashboard."""
+    repository.setup_database()
+    names = [f"Item {i}" for i in range(item_count)]
+    repository.insert_many_items([
+        (name, rng.randint(0, 50), 5, round(rng.uniform(1, 100), 2), 0.0, "Supplier", "Shelf A", "INR")
+        for name in names
+    ])
+    for name in rng.sample(names, item_count // 2):
+        stock = repository.fetch_item_by_name(name)[2]
+        repository.update_stock_level(name, max(stock - 1, 0))
+        repository.log_change(name, 'SOLD', "1 units sold.")
+    for name in rng.sample(names, item_count // 4):
+        _, _, stock, _, price, _, _, _, _ = repository.fetch_item_by_name(name)
+        repository.add_stock_to_item(name, stock + 10, price)
+    repository.fetch_inventory("stock", "desc", "item 1")
+    repository.fetch_changes_since(0)
+    return repository.fetch_dashboard_stats()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare Inventree storage engines.")
+    parser.add_argument("--scenarios", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engines = {
+            "sqlite-file": lambda i: SQLiteRepository(os.path.join(directory, f"bench-{i}.db")),
+            "sqlite-memory": lambda i: SharedMemoryRepository(),
+            "python-memory": lambda i: MemoryRepository(),
+        }
+        for engine, make_repository in engines.items():
+            rng = random.Random(0)
+            start = time.perf_counter()
+            for i in range(args.scenarios):
+                run_scenario(make_repository(i), rng)
+            elapsed = time.perf_counter() - start
+            print(f"{engine:<15} {args.scenarios / elapsed:>10,.0f} scenarios/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# File: conftest.py
+import pytest
+from storage import SQLiteRepository, SharedMemoryRepository, MemoryRepository
+
+ENGINES = {
+    "sqlite-file": lambda tmp_path: SQLiteRepository(str(tmp_path / "inventree.db")),
+    "sqlite-memory": lambda tmp_path: SharedMemoryRepository(),
+    "python-memory": lambda tmp_path: MemoryRepository(),
+}
+
+
+@pytest.fixture(params=list(ENGINES))
+def repository(request, tmp_path):
+    repository = ENGINES[request.param](tmp_path)
+    repository.setup_database()
+    repository.insert_many_items([
+        ("Hex Bolt", 10, 2, 5.0, 8.0, "Acme", "Shelf A", "INR"),
+        ("Washer", 1, 5, 0.5, 1.0, "", "Shelf B", "INR"),
+        ("Chip", 4, 1, 2.0, 3.0, "Beta", "Shelf A", "USD"),
+    ])
+    return repository
+
+
+@pytest.fixture
+def sql_repository(repository):
+    if not repository.supports_sql:
+        pytest.skip("needs a SQL backend")
+    return repository
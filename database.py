@@ -1,175 +1,79 @@
 # File: database.py
 import os
-import sqlite3
 import smtplib
-from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from storage import normalize_name, SQLiteRepository
 
 DB_FILE = "inventree.db"
 
+_repository = None
+
+def get_repository():
+    """Returns the default storage backend, opening DB_FILE with SQLite on first use."""
+    global _repository
+    if _repository is None:
+        _repository = SQLiteRepository(DB_FILE)
+    return _repository
+
+# Module-level functions kept from before the storage backends, for existing callers
+
 def execute_query(query, params=(), fetch=None):
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        if fetch == 'one':
-            return cursor.fetchone()
-        if fetch == 'all':
-            return cursor.fetchall()
+    return get_repository().execute_query(query, params, fetch)
 
 def setup_database():
-    execute_query(
-        '''
-        CREATE TABLE IF NOT EXISTS inventory (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL UNIQUE,
-            stock INTEGER NOT NULL,
-            low_stock INTEGER NOT NULL,
-            purchase_price REAL DEFAULT 0.0,
-            sale_price REAL DEFAULT 0.0,
-            supplier TEXT DEFAULT '',
-            location TEXT NOT NULL DEFAULT ''
-        )
-        '''
-    )
-    execute_query(
-        '''
-        CREATE TABLE IF NOT EXISTS history_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            timestamp TEXT NOT NULL,
-            item_name TEXT NOT NULL,
-            action TEXT NOT NULL,
-            details TEXT
-        )
-        '''
-    )
-    execute_query(
-        "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY NOT NULL, value TEXT)"
-    )
-    try:
-        execute_query(
-            "ALTER TABLE inventory ADD COLUMN location TEXT NOT NULL DEFAULT 'N/A'"
-        )
-    except sqlite3.OperationalError:
-        pass
+    get_repository().setup_database()
 
 def log_change(item_name, action, details=""):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    execute_query(
-        "INSERT INTO history_log (timestamp, item_name, action, details) VALUES (?, ?, ?, ?)",
-        (timestamp, item_name, action, details)
-    )
+    get_repository().log_change(item_name, action, details)
 
 def get_setting(key):
-    result = execute_query(
-        "SELECT value FROM settings WHERE key = ?", (key,), fetch='one'
-    )
-    return result[0] if result else ""
+    return get_repository().get_setting(key)
 
 def save_setting(key, value):
-    execute_query(
-        "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value)
-    )
+    get_repository().save_setting(key, value)
 
 def fetch_inventory(sort_column, sort_direction, search_query=""):
-    query = (
-        "SELECT name, stock, low_stock, purchase_price, sale_price, supplier, location FROM inventory"
-    )
-    params = ()
-    if search_query:
-        query += (
-            " WHERE name LIKE ? OR location LIKE ? OR supplier LIKE ?"
-        )
-        params = (
-            f'%{search_query}%',
-            f'%{search_query}%',
-            f'%{search_query}%'
-        )
-    query += f" ORDER BY {sort_column} {sort_direction}"
-    return execute_query(query, params, fetch='all')
+    return get_repository().fetch_inventory(sort_column, sort_direction, search_query)
 
 def fetch_item_by_name(name):
-    return execute_query(
-        "SELECT * FROM inventory WHERE name = ?", (name,), fetch='one'
-    )
+    return get_repository().fetch_item_by_name(name)
 
 def insert_new_item(values):
-    try:
-        execute_query(
-            "INSERT INTO inventory (name, stock, low_stock, purchase_price, sale_price, supplier, location) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            values
-        )
-        return True
-    except sqlite3.IntegrityError:
-        return False
-
-# --- NEW: Function for high-performance bulk inserts ---
-def insert_many_items(items_to_add):
-    """Inserts a list of items in a single transaction."""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.executemany(
-            "INSERT INTO inventory (name, stock, low_stock, purchase_price, sale_price, supplier, location) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            items_to_add
-        )
-        conn.commit()
+    return get_repository().insert_new_item(values)
 
+def insert_many_items(items_to_add):
+    get_repository().insert_many_items(items_to_add)
 
 def add_stock_to_item(name, new_total_stock, new_average_price):
-    execute_query(
-        "UPDATE inventory SET stock = ?, purchase_price = ? WHERE name = ?",
-        (new_total_stock, new_average_price, name)
-    )
+    get_repository().add_stock_to_item(name, new_total_stock, new_average_price)
 
-def update_item_details(name, stock, low_stock, purchase_price, sale_price, supplier, location):
-    execute_query(
-        "UPDATE inventory SET stock=?, low_stock=?, purchase_price=?, sale_price=?, supplier=?, location=? WHERE name=?",
-        (stock, low_stock, purchase_price, sale_price, supplier, location, name)
-    )
+def update_item_details(name, stock, low_stock, purchase_price, sale_price, supplier, location, currency):
+    get_repository().update_item_details(name, stock, low_stock, purchase_price, sale_price, supplier, location, currency)
 
 def delete_item_by_name(name):
-    execute_query(
-        "DELETE FROM inventory WHERE name = ?", (name,)
-    )
+    get_repository().delete_item_by_name(name)
 
 def fetch_history_log():
-    return execute_query(
-        "SELECT timestamp, item_name, action, details FROM history_log ORDER BY timestamp DESC",
-        fetch='all'
-    )
+    return get_repository().fetch_history_log()
 
-# --- MODIFIED: More efficient dashboard query ---
 def fetch_dashboard_stats():
-    """Fetches all dashboard stats in a single database connection."""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM inventory")
-        total_items = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT SUM(stock * purchase_price) FROM inventory")
-        total_value = cursor.fetchone()[0] or 0.0
-        
-        cursor.execute("SELECT COUNT(*) FROM inventory WHERE stock <= low_stock")
-        low_stock_count = cursor.fetchone()[0]
-        
-    return total_items, total_value, low_stock_count
-
+    return get_repository().fetch_dashboard_stats()
 
 def fetch_low_stock_for_email():
-    critical = execute_query("SELECT name, stock, low_stock FROM inventory WHERE stock <= low_stock", fetch='all')
-    warning = execute_query("SELECT name, stock, low_stock FROM inventory WHERE stock > low_stock AND stock <= low_stock * 1.1 AND low_stock > 0", fetch='all')
-    return critical, warning
+    return get_repository().fetch_low_stock_for_email()
+
+def update_stock_level(name, new_stock):
+    get_repository().update_stock_level(name, new_stock)
 
-def send_low_stock_email():
-    # ... (This function is unchanged)
+def send_low_stock_email(repository=None):
+    repository = repository or get_repository()
     sender_email = os.environ.get('INVENTREE_EMAIL_USER')
     password = os.environ.get('INVENTREE_EMAIL_PASS')
-    recipient_email = get_setting("recipient_email")
+    recipient_email = repository.get_setting("recipient_email")
     if not sender_email or not password or not recipient_email:
         return (False, "Email configuration is incomplete.")
-    critical_items, warning_items = fetch_low_stock_for_email()
+    critical_items, warning_items = repository.fetch_low_stock_for_email()
     if not critical_items and not warning_items:
         return (True, "No low stock items to report.")
     msg = MIMEMultipart('alternative')
@@ -194,6 +98,3 @@ def send_low_stock_email():
         return (True, f"Low stock alert email sent successfully to {recipient_email}")
     except Exception as e:
         return (False, f"Failed to send email: {e}")
-
-def update_stock_level(name, new_stock):
-    execute_query("UPDATE inventory SET stock = ? WHERE name = ?", (new_stock, name))
\ No newline at end of file
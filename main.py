@@ -3,27 +3,47 @@ import ttkbootstrap as ttk
 from ttkbootstrap.dialogs import Messagebox
 from tkinter import filedialog
 import csv
+import sqlite3
 from datetime import datetime
 from dotenv import load_dotenv
 import database  # Import our database module
+import purchasing
+import matching
+import pricing
+import reports
 
 # Load environment variables at the very start
 load_dotenv()
 
+# How often to check the database for changes made by other Inventree windows
+SYNC_INTERVAL_MS = 500
+# Above this many changed rows it is cheaper to rebuild the whole grid
+SYNC_FULL_REFRESH_THRESHOLD = 500
+NUMERIC_COLUMNS = ('stock', 'low_stock', 'purchase_price', 'sale_price')
+IMPORT_ACTION = "Import as New"
+SKIP_ACTION = "Skip (already exists)"
+
 
 class InventreeApp(ttk.Window):
-    def __init__(self, themename="flatly"):
+    def __init__(self, themename="flatly", repository=None):
         super().__init__(themename=themename)
         self.title("Inventree")
         self.geometry("1200x800")
 
         self.sort_column = "name"
         self.sort_direction = "asc"
+        self.change_seq = 0
+        self.grid_search = ""
+
+        # Any storage backend can be injected; it is passed on to purchasing and pricing
+        self.repository = repository or database.get_repository()
 
         # Initialize database and build UI
-        database.setup_database()
+        self.repository.setup_database()
+        self.data_version = self.repository.fetch_data_version()
         self._build_ui()
         self.refresh_data()
+        self.after(SYNC_INTERVAL_MS, self.poll_for_changes)
 
 
     def _build_ui(self):
@@ -46,11 +66,11 @@ class InventreeApp(ttk.Window):
         labels = [
             "Item Name:", "Supplier:", "Location:",
             "Stock to Add/Set:", "Low Stock Level:",
-            "Purchase Price (₹):", "Sale Price (₹):"
+            "Purchase Price:", "Sale Price:", "Currency:"
         ]
         entry_keys = [
             'item', 'supplier', 'location',
-            'stock', 'low_stock', 'purchase_price', 'sale_price'
+            'stock', 'low_stock', 'purchase_price', 'sale_price', 'currency'
         ]
 
         self.entries = {}
@@ -97,7 +117,7 @@ class InventreeApp(ttk.Window):
         columns = (
             'name', 'stock', 'low_stock',
             'purchase_price', 'sale_price',
-            'supplier', 'location'
+            'supplier', 'location', 'currency'
         )
 
         self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings')
@@ -111,6 +131,7 @@ class InventreeApp(ttk.Window):
         self.tree.column('name', width=250)
         self.tree.column('supplier', width=150)
         self.tree.column('location', width=150)
+        self.tree.column('currency', width=80, anchor='center')
 
         for col in ['stock', 'low_stock', 'purchase_price', 'sale_price']:
             self.tree.column(col, width=100, anchor='center')
@@ -150,6 +171,18 @@ class InventreeApp(ttk.Window):
             command=self.open_history_window, style='secondary.TButton'
         ).pack(side='left', padx=5)
 
+        # Reports run SQL over the stock movements, so they need a SQLite backend
+        ttk.Button(
+            bottom_frame, text="Reports",
+            command=self.open_reports_window, style='secondary.TButton',
+            state='normal' if self.repository.supports_sql else 'disabled'
+        ).pack(side='left', padx=5)
+
+        ttk.Button(
+            bottom_frame, text="Purchase Orders",
+            command=self.open_purchase_orders_window, style='secondary.TButton'
+        ).pack(side='left', padx=5)
+
         right_bottom_frame = ttk.Frame(bottom_frame)
         right_bottom_frame.pack(side='right')
 
@@ -194,14 +227,10 @@ class InventreeApp(ttk.Window):
 
                 all_rows = list(reader)
 
-            items_to_add = []
-            skipped_count = 0
+            base_currency = self.repository.get_base_currency()
+            valid_items = []
             error_count = 0
 
-            existing_items = {
-                row[0] for row in database.fetch_inventory(self.sort_column, self.sort_direction)
-            }
-
             for row in all_rows:
                 name = row.get('Item Name', '').strip()
 
@@ -209,10 +238,6 @@ class InventreeApp(ttk.Window):
                     error_count += 1
                     continue
 
-                if name in existing_items:
-                    skipped_count += 1
-                    continue
-
                 try:
                     stock = int(row['Stock'])
                     purchase_price = float(row['Purchase Price'])
@@ -220,19 +245,46 @@ class InventreeApp(ttk.Window):
                     sale_price = float(row.get('Sale Price') or purchase_price)
                     supplier = row.get('Supplier', '')
                     location = row.get('Location', '')
+                    currency = (row.get('Currency') or base_currency).strip().upper()
 
-                    items_to_add.append(
-                        (name, stock, low_stock, purchase_price, sale_price, supplier, location)
+                    valid_items.append(
+                        (name, stock, low_stock, purchase_price, sale_price, supplier, location, currency)
                     )
 
                 except (ValueError, TypeError):
                     error_count += 1
                     continue
 
+            existing_names = [name for name, _ in self.repository.fetch_name_keys()]
+            exact_matches, fuzzy_matches = matching.find_duplicates(
+                [item[0] for item in valid_items], existing_names
+            )
+
+            skipped_names = set()
+            if fuzzy_matches:
+                skipped_names = self.review_fuzzy_matches(fuzzy_matches)
+                if skipped_names is None:
+                    return
+
+            # Rows are skipped by position so that only the first of several rows with the
+            # same name is imported
+            items_to_add = []
+            imported_keys = set()
+            for item in valid_items:
+                key = database.normalize_name(item[0])
+                if item[0] in exact_matches or item[0] in skipped_names or key in imported_keys:
+                    continue
+                imported_keys.add(key)
+                items_to_add.append(item)
+            skipped_count = len(valid_items) - len(items_to_add)
+
             if items_to_add:
-                database.insert_many_items(items_to_add)
+                self.repository.insert_many_items(items_to_add)
+                self.repository.log_movements_many(
+                    [(item[0], 'RECEIPT', item[1], item[3], 0.0) for item in items_to_add]
+                )
                 for item in items_to_add:
-                    database.log_change(item[0], 'CREATED', f"Item imported from CSV with stock {item[1]}.")
+                    self.repository.log_change(item[0], 'CREATED', f"Item imported from CSV with stock {item[1]}.")
 
             Messagebox.show_info(
                 f"Import Complete!\n\nSuccessfully Added: {len(items_to_add)}\n"
@@ -241,11 +293,79 @@ class InventreeApp(ttk.Window):
                 title="Import Summary"
             )
 
-            self.refresh_data()
+            self.sync_changes()
 
         except Exception as e:
             Messagebox.show_error(f"An error occurred during import: {e}", title="Import Error")
 
+    def review_fuzzy_matches(self, matches):
+        """Lets the user confirm which near-duplicate rows are existing items.
+
+        Rows are imported unless the user marks them as already existing; only very close
+        matches start out marked. Returns the set of incoming names to skip, or None if the
+        import was cancelled.
+        """
+        review_window = tk.Toplevel(self)
+        review_window.title("Review Possible Duplicates")
+        review_window.geometry("900x500")
+        review_window.transient(self)
+        review_window.grab_set()
+
+        ttk.Label(
+            review_window, padding=10,
+            text="These rows look like items you already have. Double-click a row to switch between "
+                 "importing it as a new item and skipping it because it already exists. "
+                 "Skipped rows are not imported and their stock is not added."
+        ).pack(fill='x')
+
+        review_tree = ttk.Treeview(
+            review_window,
+            columns=('incoming', 'existing', 'score', 'action'),
+            show='headings'
+        )
+
+        for col, text in [('incoming', "Incoming Name"), ('existing', "Existing Item"),
+                          ('score', "Similarity"), ('action', "Action")]:
+            review_tree.heading(col, text=text)
+        review_tree.column('score', width=100, anchor='center')
+        review_tree.column('action', width=160, anchor='center')
+
+        review_tree.pack(fill='both', expand=True, padx=10)
+
+        for i, (incoming, existing, score) in enumerate(sorted(matches, key=lambda m: -m[2])):
+            action = SKIP_ACTION if score >= matching.LIKELY_DUPLICATE_SCORE else IMPORT_ACTION
+            review_tree.insert('', 'end', iid=str(i), values=(incoming, existing, f"{score:.0%}", action))
+
+        def toggle_action(event=None):
+            for row_id in review_tree.selection():
+                values = list(review_tree.item(row_id, 'values'))
+                values[3] = IMPORT_ACTION if values[3] == SKIP_ACTION else SKIP_ACTION
+                review_tree.item(row_id, values=values)
+
+        review_tree.bind('<Double-1>', toggle_action)
+
+        result = {'skipped': None}
+
+        def confirm():
+            result['skipped'] = {
+                review_tree.item(row_id, 'values')[0]
+                for row_id in review_tree.get_children()
+                if review_tree.item(row_id, 'values')[3] == SKIP_ACTION
+            }
+            review_window.destroy()
+
+        button_frame = ttk.Frame(review_window, padding=10)
+        button_frame.pack(fill='x')
+
+        ttk.Button(button_frame, text="Toggle Selected", command=toggle_action).pack(side='left')
+        ttk.Button(button_frame, text="Cancel Import", command=review_window.destroy).pack(side='right')
+        ttk.Button(
+            button_frame, text="Continue Import", command=confirm, style='success.TButton'
+        ).pack(side='right', padx=5)
+
+        self.wait_window(review_window)
+        return result['skipped']
+
     def export_to_csv(self):
         filepath = filedialog.asksaveasfilename(
             defaultextension=".csv", filetypes=[("CSV files", "*.csv")]
@@ -254,14 +374,14 @@ class InventreeApp(ttk.Window):
         if not filepath:
             return
 
-        rows = database.fetch_inventory(self.sort_column, self.sort_direction)
+        rows = self.repository.fetch_inventory(self.sort_column, self.sort_direction)
 
         try:
             with open(filepath, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
                 writer.writerow([
                     'Item Name', 'Current Stock', 'Low Stock Level',
-                    'Purchase Price', 'Sale Price', 'Supplier', 'Location'
+                    'Purchase Price', 'Sale Price', 'Supplier', 'Location', 'Currency'
                 ])
                 writer.writerows(rows)
 
@@ -280,7 +400,6 @@ class InventreeApp(ttk.Window):
         item_values = self.tree.item(selected_item_id, 'values')
         item_name = item_values[0]
         current_stock = int(item_values[1])
-        low_stock = int(item_values[2])
 
         sale_dialog = tk.Toplevel(self)
         sale_dialog.title("Record Sale")
@@ -310,23 +429,25 @@ class InventreeApp(ttk.Window):
                     Messagebox.show_error("Quantity must be a positive number.", parent=sale_dialog)
                     return
 
-                if qty_to_sell > current_stock:
-                    Messagebox.show_error("Insufficient stock to complete sale.", parent=sale_dialog)
-                    return
-
             except ValueError:
                 Messagebox.show_error("Please enter a valid number.", parent=sale_dialog)
                 return
 
-            new_stock = current_stock - qty_to_sell
-            database.update_stock_level(item_name, new_stock)
-            database.log_change(item_name, 'SOLD', f"{qty_to_sell} units sold. Stock: {current_stock} -> {new_stock}.")
+            # Another window may have sold from this item since the grid was drawn, so the
+            # stock check is left to the repository's conditional decrement
+            sold = self.repository.sell_stock(item_name, qty_to_sell)
+            if sold is None:
+                self.sync_changes()
+                Messagebox.show_error("Insufficient stock to complete sale.", parent=sale_dialog)
+                return
+
+            old_stock, new_stock, low_stock, _, _ = sold
 
             sale_dialog.destroy()
-            self.refresh_data()
+            self.sync_changes()
 
             Messagebox.show_info(f"{qty_to_sell} units of '{item_name}' sold successfully.")
-            self.check_and_notify(current_stock, new_stock, low_stock)
+            self.check_and_notify(old_stock, new_stock, low_stock)
 
         button_frame = ttk.Frame(dialog_frame)
         button_frame.pack(pady=10)
@@ -339,21 +460,124 @@ class InventreeApp(ttk.Window):
         self.tree.delete(*self.tree.get_children())
 
         for row in rows:
-            name, stock, low_stock, purchase_price, sale_price, supplier, location = row
+            name, stock, low_stock, purchase_price, sale_price, supplier, location, currency = row
             formatted_row = (
                 name, stock, low_stock,
                 f"{purchase_price:.2f}", f"{sale_price:.2f}",
-                supplier, location
+                supplier, location, currency
             )
 
             tags = ('low_stock_tag',) if stock <= low_stock else ()
-            self.tree.insert('', 'end', values=formatted_row, tags=tags)
+            self.tree.insert('', 'end', iid=name, values=formatted_row, tags=tags)
 
     def refresh_data(self):
-        rows = database.fetch_inventory(self.sort_column, self.sort_direction, self.search_entry.get())
+        # Read the sequence first so changes committed during the rebuild are applied on the next sync
+        self.change_seq = self.repository.fetch_change_sequence()
+        self.grid_search = self.search_entry.get()
+        rows = self.repository.fetch_inventory(self.sort_column, self.sort_direction, self.grid_search)
         self.populate_treeview(rows)
         self.update_dashboard()
 
+    def update_dashboard(self):
+        total_items, total_value, low_stock_count = self.repository.fetch_dashboard_stats()
+        self.total_items_var.set(f"Total Items: {total_items}")
+        base_currency = self.repository.get_base_currency()
+        total_value_text = f"Total Stock Value: {base_currency} {total_value:,.2f}"
+        unconverted = self.repository.fetch_unconverted_currencies()
+        if unconverted:
+            total_value_text += f" (excludes {', '.join(unconverted)}: no exchange rate)"
+        self.total_value_var.set(total_value_text)
+        self.low_stock_var.set(f"Low Stock Items: {low_stock_count}")
+
+    def poll_for_changes(self):
+        try:
+            data_version = self.repository.fetch_data_version()
+            if data_version != self.data_version:
+                self.sync_changes()
+                # Only recorded once applied, so a failed sync is retried on the next poll
+                self.data_version = data_version
+        except sqlite3.Error as e:
+            # A locked or briefly unreachable database must not stop syncing for good
+            print(f"Could not check for changes: {e}")
+        finally:
+            self.after(SYNC_INTERVAL_MS, self.poll_for_changes)
+
+    def sync_changes(self):
+        """Applies inventory rows changed since the last sync to the grid and dashboard."""
+        if self.search_entry.get() != self.grid_search:
+            # The search box was changed or cleared, so the grid needs refiltering anyway
+            self.refresh_data()
+            return
+
+        latest_seq, changes = self.repository.fetch_changes_since(self.change_seq)
+        if not changes:
+            return
+        if len(changes) > SYNC_FULL_REFRESH_THRESHOLD:
+            self.refresh_data()
+            return
+
+        self.change_seq = latest_seq
+        search_query = self.grid_search.lower()
+        # Fetched once per batch and kept in step with the grid as rows are moved
+        children = list(self.tree.get_children())
+
+        for name, row in changes:
+            if row is not None and search_query and not any(
+                search_query in field.lower() for field in (row[0], row[6], row[5])
+            ):
+                row = None
+
+            if row is None:
+                if self.tree.exists(name):
+                    del children[self.tree.index(name)]
+                    self.tree.delete(name)
+                continue
+
+            self._place_row(row, children)
+
+        self.update_dashboard()
+
+    def _place_row(self, row, children):
+        """Inserts or updates a row and moves it into sort position.
+
+        `children` is the grid's current row order; it is updated to match the move.
+        """
+        name, stock, low_stock, purchase_price, sale_price, supplier, location, currency = row
+        formatted_row = (
+            name, stock, low_stock,
+            f"{purchase_price:.2f}", f"{sale_price:.2f}",
+            supplier, location, currency
+        )
+        tags = ('low_stock_tag',) if stock <= low_stock else ()
+
+        exists = self.tree.exists(name)
+        if exists:
+            # Detached first so the move index counts only the other rows
+            del children[self.tree.index(name)]
+            self.tree.detach(name)
+
+        # Binary search for the row's position under the current sort order
+        column_index = self.tree['columns'].index(self.sort_column)
+        to_key = float if self.sort_column in NUMERIC_COLUMNS else str
+        key = to_key(formatted_row[column_index])
+        descending = self.sort_direction == "desc"
+
+        low, high = 0, len(children)
+        while low < high:
+            middle = (low + high) // 2
+            other = to_key(self.tree.set(children[middle], self.sort_column))
+            if (other > key) if descending else (other < key):
+                low = middle + 1
+            else:
+                high = middle
+
+        if exists:
+            self.tree.item(name, values=formatted_row, tags=tags)
+            self.tree.move(name, '', low)
+        else:
+            self.tree.insert('', low, iid=name, values=formatted_row, tags=tags)
+        children.insert(low, name)
+
     def sort_by_column(self, column):
         if self.sort_column == column:
             self.sort_direction = "desc" if self.sort_direction == "asc" else "asc"
@@ -383,23 +607,39 @@ class InventreeApp(ttk.Window):
             Messagebox.show_error("Stock and Price must be valid numbers.", title="Input Error")
             return
 
-        existing_item = database.fetch_item_by_name(vals['item'])
+        base_currency = self.repository.get_base_currency()
+        currency = (vals['currency'] or base_currency).strip().upper()
+        existing_item = self.repository.fetch_item_by_key(vals['item'])
 
         if existing_item:
-            _, _, current_stock, _, current_avg_price, _, _, _ = existing_item
+            _, item_name, current_stock, _, current_avg_price, _, _, _, item_currency = existing_item
+            if currency != item_currency:
+                # The average cost is kept in the item's own currency
+                converted_price = pricing.convert(
+                    purchase_price_new, currency, item_currency,
+                    self.repository.fetch_exchange_rates()
+                )
+                if converted_price is None:
+                    Messagebox.show_error(
+                        f"No exchange rate loaded to convert {currency} to {item_currency}.",
+                        title="Currency Error"
+                    )
+                    return
+                purchase_price_new = converted_price
             new_stock = current_stock + stock_to_add
 
             new_avg_price = (
                 (current_stock * current_avg_price) + (stock_to_add * purchase_price_new)
             ) / new_stock
 
-            database.add_stock_to_item(vals['item'], new_stock, new_avg_price)
-            database.log_change(
-                vals['item'], 'STOCK ADDED',
+            self.repository.add_stock_to_item(item_name, new_stock, new_avg_price)
+            self.repository.log_movement(item_name, 'RECEIPT', stock_to_add, purchase_price_new)
+            self.repository.log_change(
+                item_name, 'STOCK ADDED',
                 f"{stock_to_add} units added. Stock: {current_stock} -> {new_stock}."
             )
 
-            Messagebox.show_info(f"Updated stock for '{vals['item']}'.", title="Stock Updated")
+            Messagebox.show_info(f"Updated stock for '{item_name}'.", title="Stock Updated")
             self.check_and_notify(current_stock, new_stock, int(vals['low_stock'] or current_stock))
 
         else:
@@ -408,11 +648,12 @@ class InventreeApp(ttk.Window):
 
             new_item_vals = (
                 vals['item'], stock_to_add, low_stock,
-                purchase_price_new, sale_price, vals['supplier'], vals['location']
+                purchase_price_new, sale_price, vals['supplier'], vals['location'], currency
             )
 
-            if database.insert_new_item(new_item_vals):
-                database.log_change(vals['item'], 'CREATED', f"Item created with stock {stock_to_add}.")
+            if self.repository.insert_new_item(new_item_vals):
+                self.repository.log_change(vals['item'], 'CREATED', f"Item created with stock {stock_to_add}.")
+                self.repository.log_movement(vals['item'], 'RECEIPT', stock_to_add, purchase_price_new)
                 Messagebox.show_info(f"New item '{vals['item']}' added.", title="Item Added")
                 self.check_and_notify(float('inf'), stock_to_add, low_stock)
             else:
@@ -422,7 +663,7 @@ class InventreeApp(ttk.Window):
                 )
 
         self.clear_fields()
-        self.refresh_data()
+        self.sync_changes()
 
     def update_item(self):
         selected_item = self.tree.focus()
@@ -449,6 +690,7 @@ class InventreeApp(ttk.Window):
             Messagebox.show_error("Stock and Price fields must be valid numbers.", title="Input Error")
             return
 
+        new_currency = (vals['currency'] or old_values[7]).strip().upper()
         details = []
 
         if old_stock != new_stock:
@@ -463,18 +705,22 @@ class InventreeApp(ttk.Window):
             details.append(f"Supplier: '{old_values[5]}' -> '{vals['supplier']}'")
         if old_values[6] != vals['location']:
             details.append(f"Location: '{old_values[6]}' -> '{vals['location']}'")
+        if old_values[7] != new_currency:
+            details.append(f"Currency: {old_values[7]} -> {new_currency}")
 
         if details:
-            database.log_change(original_name, 'UPDATED', "; ".join(details))
+            self.repository.log_change(original_name, 'UPDATED', "; ".join(details))
+        if old_stock != new_stock:
+            self.repository.log_movement(original_name, 'ADJUST', new_stock - old_stock, new_purchase_price)
 
-        database.update_item_details(
+        self.repository.update_item_details(
             original_name, new_stock, new_low_stock,
             new_purchase_price, new_sale_price,
-            vals['supplier'], vals['location']
+            vals['supplier'], vals['location'], new_currency
         )
 
         self.clear_fields()
-        self.refresh_data()
+        self.sync_changes()
 
         Messagebox.show_info(f"'{original_name}' updated.", "Success")
         self.check_and_notify(old_stock, new_stock, new_low_stock)
@@ -493,11 +739,11 @@ class InventreeApp(ttk.Window):
         ) != 'Yes':
             return
 
-        database.log_change(item_name, 'DELETED', "Item removed from inventory.")
-        database.delete_item_by_name(item_name)
+        self.repository.log_change(item_name, 'DELETED', "Item removed from inventory.")
+        self.repository.delete_item_by_name(item_name)
 
         self.clear_fields()
-        self.refresh_data()
+        self.sync_changes()
 
     def populate_fields_on_select(self, event):
         selected_item = self.tree.focus()
@@ -510,7 +756,7 @@ class InventreeApp(ttk.Window):
         entry_map = [
             'item', 'stock', 'low_stock',
             'purchase_price', 'sale_price',
-            'supplier', 'location'
+            'supplier', 'location', 'currency'
         ]
 
         for i, key in enumerate(entry_map):
@@ -549,14 +795,199 @@ class InventreeApp(ttk.Window):
 
         log_tree.pack(fill='both', expand=True, padx=10, pady=10)
 
-        rows = database.fetch_history_log()
+        rows = self.repository.fetch_history_log()
         for row in rows:
             log_tree.insert('', 'end', values=row)
 
+    def open_reports_window(self):
+        reports_window = tk.Toplevel(self)
+        reports_window.title("Reports")
+        reports_window.geometry("1000x550")
+        reports_window.grab_set()
+
+        report_types = {
+            "Margin by Item": ("Item", 30),
+            "Margin by Supplier": ("Supplier", 30),
+            "Margin by Location": ("Location", 30),
+            "Turnover": (None, 30),
+            "Dead Stock": (None, 90),
+        }
+
+        controls_frame = ttk.Frame(reports_window, padding=10)
+        controls_frame.pack(fill='x')
+
+        ttk.Label(controls_frame, text="Report:").pack(side='left', padx=5)
+        report_box = ttk.Combobox(controls_frame, values=list(report_types), state='readonly', width=20)
+        report_box.current(0)
+        report_box.pack(side='left')
+
+        ttk.Label(controls_frame, text="Days:").pack(side='left', padx=(15, 5))
+        days_entry = ttk.Entry(controls_frame, width=6)
+        days_entry.insert(0, "30")
+        days_entry.pack(side='left')
+
+        note_var = tk.StringVar()
+        ttk.Label(reports_window, textvariable=note_var, padding=(10, 0)).pack(fill='x')
+
+        report_tree = ttk.Treeview(reports_window, show='headings')
+        report_tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+        def select_report(event=None):
+            days_entry.delete(0, 'end')
+            days_entry.insert(0, str(report_types[report_box.get()][1]))
+
+        def run_report():
+            try:
+                days = int(days_entry.get())
+            except ValueError:
+                Messagebox.show_error("Days must be a whole number.", title="Input Error", parent=reports_window)
+                return
+
+            report = report_box.get()
+            group, _ = report_types[report]
+            if report == "Dead Stock":
+                headers = ["Item", "Stock", "Stock Value", "Last Sale"]
+                rows = reports.dead_stock_report(days, repository=self.repository)
+            else:
+                start, end = reports.report_window(days)
+                if report == "Turnover":
+                    headers = ["Item", "Units Sold", "COGS", "Stock", "Stock Value", "Turnover", "Days of Stock"]
+                    rows = reports.turnover_report(start, end, self.repository)
+                else:
+                    headers = [group, "Units Sold", "Revenue", "Cost", "Margin", "Margin %"]
+                    rows = reports.margin_report(group.lower(), start, end, self.repository)
+
+            note = f"Amounts in {self.repository.get_base_currency()}."
+            missing = reports.unconverted_currencies(self.repository)
+            if missing:
+                note += f" Left out, no exchange rate loaded: {', '.join(missing)}."
+            note_var.set(note)
+
+            columns = [f"c{i}" for i in range(len(headers))]
+            report_tree.delete(*report_tree.get_children())
+            report_tree.configure(columns=columns)
+            for column, header in zip(columns, headers):
+                report_tree.heading(column, text=header)
+                report_tree.column(column, width=120, anchor='w' if column == 'c0' else 'e')
+            for row in rows:
+                report_tree.insert('', 'end', values=[
+                    "-" if value is None else f"{value:,.2f}" if isinstance(value, float) else value
+                    for value in row
+                ])
+
+        report_box.bind("<<ComboboxSelected>>", select_report)
+        ttk.Button(controls_frame, text="Run Report", command=run_report, style='primary.TButton').pack(side='left', padx=15)
+
+        run_report()
+
+    def open_purchase_orders_window(self):
+        if not self.repository.supports_sql:
+            Messagebox.show_error("Purchase orders need a SQLite storage backend.", title="Not Available")
+            return
+
+        po_window = tk.Toplevel(self)
+        po_window.title("Purchase Orders")
+        po_window.geometry("900x500")
+        po_window.grab_set()
+
+        po_tree = ttk.Treeview(
+            po_window,
+            columns=('id', 'supplier', 'status', 'created_at', 'lines', 'total_cost'),
+            show='headings'
+        )
+
+        for col in po_tree['columns']:
+            po_tree.heading(col, text=col.replace('_', ' ').title())
+        po_tree.column('id', width=60, anchor='center')
+        for col in ['status', 'lines', 'total_cost']:
+            po_tree.column(col, width=100, anchor='center')
+
+        po_tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+        def load_orders():
+            po_tree.delete(*po_tree.get_children())
+            base_currency = self.repository.get_base_currency()
+            for po_id, supplier, status, created_at, line_count, total_cost in purchasing.fetch_purchase_orders(repository=self.repository):
+                total = f"{base_currency} {total_cost:,.2f}" if total_cost is not None else "No exchange rate"
+                po_tree.insert(
+                    '', 'end', iid=str(po_id),
+                    values=(po_id, supplier, status, created_at, line_count, total)
+                )
+
+        def generate_orders():
+            po_ids = purchasing.generate_reorder_purchase_orders(repository=self.repository)
+            load_orders()
+            if not po_ids:
+                Messagebox.show_info("No items below their reorder point need ordering.", parent=po_window)
+
+        def receive_order():
+            selected_po = po_tree.focus()
+            if not selected_po:
+                Messagebox.show_warning("Please select a purchase order to receive.", title="Selection Error", parent=po_window)
+                return
+
+            success, message = purchasing.receive_purchase_order(int(selected_po), self.repository)
+            if not success:
+                Messagebox.show_error(message, title="Receiving Error", parent=po_window)
+                return
+
+            load_orders()
+            self.sync_changes()
+            Messagebox.show_info(message, title="Order Received", parent=po_window)
+
+        def view_lines(event=None):
+            selected_po = po_tree.focus()
+            if not selected_po:
+                Messagebox.show_warning("Please select a purchase order to view.", title="Selection Error", parent=po_window)
+                return
+
+            lines_window = tk.Toplevel(po_window)
+            lines_window.title(f"Purchase Order #{selected_po}")
+            lines_window.geometry("700x400")
+            lines_window.transient(po_window)
+
+            lines_tree = ttk.Treeview(
+                lines_window,
+                columns=('item_name', 'quantity', 'unit_cost', 'currency', 'line_cost'),
+                show='headings'
+            )
+            for col in lines_tree['columns']:
+                lines_tree.heading(col, text=col.replace('_', ' ').title())
+            for col in ['quantity', 'unit_cost', 'currency', 'line_cost']:
+                lines_tree.column(col, width=100, anchor='center')
+            lines_tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+            for item_name, quantity, unit_cost, currency, line_cost in purchasing.fetch_purchase_order_lines(
+                int(selected_po), self.repository
+            ):
+                lines_tree.insert(
+                    '', 'end', values=(item_name, quantity, f"{unit_cost:.2f}", currency, f"{line_cost:.2f}")
+                )
+
+        po_tree.bind('<Double-1>', view_lines)
+
+        button_frame = ttk.Frame(po_window, padding=(10, 0, 10, 10))
+        button_frame.pack(fill='x')
+
+        ttk.Button(
+            button_frame, text="Generate Reorder POs",
+            command=generate_orders, style='primary.TButton'
+        ).pack(side='left')
+        ttk.Button(
+            button_frame, text="Receive Selected PO",
+            command=receive_order, style='success.TButton'
+        ).pack(side='left', padx=5)
+        ttk.Button(
+            button_frame, text="View Lines",
+            command=view_lines, style='secondary.TButton'
+        ).pack(side='left')
+
+        load_orders()
+
     def open_settings_window(self):
         settings_window = tk.Toplevel(self)
         settings_window.title("Settings")
-        settings_window.geometry("500x150")
+        settings_window.geometry("500x220")
         settings_window.grab_set()
 
         frame = ttk.Frame(settings_window, padding=20)
@@ -566,18 +997,47 @@ class InventreeApp(ttk.Window):
         email_entry = ttk.Entry(frame, width=40)
         email_entry.grid(row=0, column=1, padx=5)
 
-        email_entry.insert(0, database.get_setting("recipient_email"))
+        email_entry.insert(0, self.repository.get_setting("recipient_email"))
+
+        ttk.Label(frame, text="Base Currency:").grid(row=1, column=0, sticky='w', pady=(10, 0))
+        currency_entry = ttk.Entry(frame, width=10)
+        currency_entry.grid(row=1, column=1, padx=5, pady=(10, 0), sticky='w')
+
+        currency_entry.insert(0, self.repository.get_base_currency())
+
+        def load_rates():
+            filepath = filedialog.askopenfilename(
+                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+                title="Select Exchange Rate CSV"
+            )
+            if not filepath:
+                return
+            try:
+                count = pricing.load_exchange_rates(filepath, self.repository)
+            except Exception as e:
+                Messagebox.show_error(f"Failed to load exchange rates: {e}", title="Import Error", parent=settings_window)
+                return
+            self.update_dashboard()
+            Messagebox.show_info(f"Loaded {count} exchange rates.", title="Exchange Rates", parent=settings_window)
 
         def save():
-            database.save_setting("recipient_email", email_entry.get())
+            base_currency = currency_entry.get().strip()
+            if base_currency:
+                success, message = self.repository.set_base_currency(base_currency)
+                if not success:
+                    Messagebox.show_error(message, title="Currency Error", parent=settings_window)
+                    return
+            self.repository.save_setting("recipient_email", email_entry.get())
+            self.update_dashboard()
             settings_window.destroy()
 
-        ttk.Button(frame, text="Save", command=save, style='success.TButton').grid(row=1, column=1, sticky='e', pady=10)
+        ttk.Button(frame, text="Load Exchange Rates", command=load_rates).grid(row=2, column=0, sticky='w', pady=10)
+        ttk.Button(frame, text="Save", command=save, style='success.TButton').grid(row=2, column=1, sticky='e', pady=10)
 
  
     def check_and_notify(self, old_stock, new_stock, low_stock_level):
         if new_stock <= low_stock_level and old_stock > low_stock_level:
-            success, message = database.send_low_stock_email()
+            success, message = database.send_low_stock_email(self.repository)
             print(message)
             if not success:
                 Messagebox.show_error(message, title="Email Notification Error")
@@ -0,0 +1,145 @@
+# File: matching.py
+import re
+from collections import Counter
+from itertools import chain
+from database import normalize_name
+
+NGRAM_SIZE = 3
+BLOCKING_NGRAM_SIZE = 5
+DEFAULT_THRESHOLD = 0.6
+# Matches scoring at least this are pre-selected as duplicates in the import review
+LIKELY_DUPLICATE_SCORE = 0.9
+BLOCKING_KEYS = 4
+MAX_BLOCK_SIZE = 50
+
+_SEPARATORS = re.compile(r"[\W_]+")
+_NUMBERS = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _ngrams(text, n):
+    if len(text) <= n:
+        return {text}
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _scoring_ngrams(key):
+    return _ngrams(f" {_SEPARATORS.sub(' ', key).strip()} ", NGRAM_SIZE)
+
+
+def _blocking_ngrams(key):
+    return _ngrams(_SEPARATORS.sub('', key), BLOCKING_NGRAM_SIZE)
+
+
+def _numbers(key):
+    # Sizes and ratings such as M8x40 or 10k; names that differ in them are different items
+    return [number.lstrip('0') or '0' for number in _NUMBERS.findall(key)]
+
+
+def name_ngrams(name):
+    """Returns the set of character trigrams used to score a name, ignoring case and punctuation."""
+    return _scoring_ngrams(normalize_name(name))
+
+
+def similarity(first, second):
+    """Returns the trigram Jaccard similarity of two item names, from 0.0 to 1.0."""
+    first, second = name_ngrams(first), name_ngrams(second)
+    shared = len(first & second)
+    return shared / (len(first) + len(second) - shared)
+
+
+def find_duplicates(incoming_names, existing_names, threshold=DEFAULT_THRESHOLD):
+    """Matches incoming item names against existing ones.
+
+    Returns a pair (exact, fuzzy):
+      exact -- {incoming_name: existing_name} for names with the same normalized key,
+               including differently written repeats of an earlier name in the same
+               batch. A name repeated exactly is not listed, so callers that skip rows
+               by name keep its first occurrence and must drop later ones by position.
+      fuzzy -- [(incoming_name, existing_name, score)] for the best remaining match whose
+               trigram Jaccard similarity is at least `threshold` and whose numbers are
+               the same, so size variants like "M8x40" and "M8x50" are never paired.
+
+    Candidate pairs come from n-gram blocking. Every name is cut into 5-grams with the
+    separators removed, each name is filed under its `BLOCKING_KEYS` rarest 5-grams, and
+    5-grams shared by more than `MAX_BLOCK_SIZE` names are treated as stop-grams. Only
+    names that share a block are scored, so near-duplicates -- which keep most of their
+    rare grams -- are found without comparing all N x M pairs.
+    """
+    existing_by_key = {}
+    for name in existing_names:
+        existing_by_key.setdefault(normalize_name(name), name)
+
+    exact = {}
+    pending = {}
+    for name in incoming_names:
+        key = normalize_name(name)
+        if key in existing_by_key:
+            exact[name] = existing_by_key[key]
+        elif key in pending:
+            if name != pending[key]:
+                exact[name] = pending[key]
+        else:
+            pending[key] = name
+
+    if not pending or not existing_by_key:
+        return exact, []
+
+    existing_keys = list(existing_by_key)
+    existing_blocking = [_blocking_ngrams(key) for key in existing_keys]
+    pending_blocking = [_blocking_ngrams(key) for key in pending]
+
+    # Grams are ranked by how many existing names contain them; an incoming gram that no
+    # existing name contains cannot link to anything and is never used as a key.
+    frequency = Counter(chain.from_iterable(existing_blocking))
+
+    def blocking_keys(grams):
+        keys = [gram for gram in grams if 0 < frequency[gram] <= MAX_BLOCK_SIZE]
+        if len(keys) > BLOCKING_KEYS:
+            # Sorting by gram first keeps the choice independent of set iteration order
+            keys.sort()
+            keys.sort(key=lambda gram: frequency[gram])
+            del keys[BLOCKING_KEYS:]
+        return keys
+
+    blocks = {}
+    for item_id, grams in enumerate(existing_blocking):
+        for gram in blocking_keys(grams):
+            blocks.setdefault(gram, []).append(item_id)
+
+    scoring_cache = {}
+
+    def scoring_ngrams(item_id):
+        grams = scoring_cache.get(item_id)
+        if grams is None:
+            grams = scoring_cache[item_id] = _scoring_ngrams(existing_keys[item_id])
+        return grams
+
+    fuzzy = []
+    for (key, name), block_grams in zip(pending.items(), pending_blocking):
+        keys = blocking_keys(block_grams)
+        shared_keys = Counter(chain.from_iterable(blocks.get(gram, ()) for gram in keys))
+        # With several keys to go on, a name sharing just one of them is a chance collision
+        min_shared = 2 if len(keys) > 2 else 1
+        candidates = [item_id for item_id, shared in shared_keys.items() if shared >= min_shared]
+        if not candidates:
+            continue
+
+        grams = _scoring_ngrams(key)
+        numbers = _numbers(key)
+        size = len(grams)
+        min_size, max_size = threshold * size, size / threshold
+        best_id, best_score = None, threshold
+        for item_id in candidates:
+            other = scoring_ngrams(item_id)
+            if not min_size <= len(other) <= max_size:
+                continue
+            shared = len(grams & other)
+            score = shared / (size + len(other) - shared)
+            if score < best_score or _numbers(existing_keys[item_id]) != numbers:
+                continue
+            if score > best_score or best_id is None:
+                best_id, best_score = item_id, score
+        if best_id is not None:
+            fuzzy.append((name, existing_by_key[existing_keys[best_id]], best_score))
+
+    return exact, fuzzy
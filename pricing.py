@@ -0,0 +1,92 @@
+# File: pricing.py
+import argparse
+import csv
+from datetime import datetime
+import database
+from reports import format_table
+
+
+def load_exchange_rates(filepath, repository=None):
+    """Loads a CSV with 'Currency' and 'Rate' columns into the exchange-rate table.
+
+    Rate is the value of one unit of the currency in the base currency. Returns the
+    number of rates loaded.
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        if not {'Currency', 'Rate'}.issubset(reader.fieldnames or ()):
+            raise ValueError("Exchange-rate CSV needs 'Currency' and 'Rate' columns.")
+        rates = {
+            row['Currency'].strip().upper(): float(row['Rate'])
+            for row in reader if row.get('Currency', '').strip()
+        }
+    (repository or database.get_repository()).save_exchange_rates(rates)
+    return len(rates)
+
+
+def convert(amount, from_currency, to_currency, rates=None, repository=None):
+    """Converts an amount between currencies via the base currency.
+
+    Returns None when either currency has no loaded exchange rate.
+    """
+    if from_currency == to_currency:
+        return amount
+    rates = rates or (repository or database.get_repository()).fetch_exchange_rates()
+    if from_currency not in rates or to_currency not in rates:
+        return None
+    return amount * rates[from_currency] / rates[to_currency]
+
+
+def valuation_report(repository=None):
+    """Returns (currency, total_value, rate, base_value) rows from the per-currency totals."""
+    repository = repository or database.get_repository()
+    rates = repository.fetch_exchange_rates()
+    return [
+        (currency, total, rates.get(currency),
+         total * rates[currency] if currency in rates else None)
+        for currency, total in repository.fetch_valuation_by_currency()
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inventree prices and currencies.")
+    parser.add_argument("--db", default=database.DB_FILE, help="Path to the Inventree database.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    load_rates = subparsers.add_parser("load-rates", help="Load exchange rates from a CSV file.")
+    load_rates.add_argument("filepath")
+    subparsers.add_parser("valuation", help="Stock value per currency and in the base currency.")
+    history = subparsers.add_parser("history", help="Price history of an item.")
+    history.add_argument("name")
+    as_of = subparsers.add_parser("as-of", help="Prices of an item at a point in time.")
+    as_of.add_argument("name")
+    as_of.add_argument("when", help="Date or date and time, e.g. 2026-05-01 or '2026-05-01 14:30'.")
+
+    args = parser.parse_args(argv)
+    repository = database.SQLiteRepository(args.db)
+    repository.setup_database()
+
+    if args.command == "load-rates":
+        print(f"Loaded {load_exchange_rates(args.filepath, repository)} exchange rates.")
+    elif args.command == "valuation":
+        base_currency = repository.get_base_currency()
+        rows = [
+            (currency, total, f"{rate:.6g}" if rate is not None else None, base_value)
+            for currency, total, rate, base_value in valuation_report(repository)
+        ]
+        print(format_table(["Currency", "Stock Value", "Rate", f"Value ({base_currency})"], rows))
+    elif args.command == "history":
+        print(format_table(
+            ["Changed At", "Purchase Price", "Sale Price", "Currency"],
+            repository.fetch_price_history(args.name)
+        ))
+    else:
+        price = repository.fetch_price_as_of(args.name, datetime.fromisoformat(args.when))
+        if price is None:
+            print(f"No price recorded for '{args.name}' at {args.when}.")
+        else:
+            print(format_table(["Purchase Price", "Sale Price", "Currency"], [price]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# File: purchasing.py
+from datetime import datetime
+import database
+import pricing
+from reports import RATES_CTE
+from storage import UNASSIGNED_SUPPLIER
+
+
+def _now():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _supplier_id(cursor, name):
+    cursor.execute("INSERT OR IGNORE INTO suppliers (name) VALUES (?)", (name,))
+    cursor.execute("SELECT id FROM suppliers WHERE name = ?", (name,))
+    return cursor.fetchone()[0]
+
+
+def create_purchase_order(supplier_name, lines, repository=None):
+    """Creates an open PO from (item_name, quantity, unit_cost, currency) lines and returns its id."""
+    repository = repository or database.get_repository()
+    with repository.connect() as conn:
+        cursor = conn.cursor()
+        supplier_id = _supplier_id(cursor, supplier_name.strip() or UNASSIGNED_SUPPLIER)
+        cursor.execute(
+            "INSERT INTO purchase_orders (supplier_id, status, created_at) VALUES (?, 'OPEN', ?)",
+            (supplier_id, _now())
+        )
+        po_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO purchase_order_lines (po_id, item_name, quantity, unit_cost, currency) VALUES (?, ?, ?, ?, ?)",
+            [(po_id, name, quantity, unit_cost, currency.strip().upper())
+             for name, quantity, unit_cost, currency in lines]
+        )
+        conn.commit()
+    return po_id
+
+
+def generate_reorder_purchase_orders(order_up_to_factor=2, repository=None):
+    """Creates one open PO per supplier for every item at or below its low-stock level.
+
+    Each line orders enough to bring the item back up to `order_up_to_factor` times its
+    low-stock level, at the item's current average purchase price and currency. Items that are already
+    on an open PO are left out. Returns the ids of the new POs.
+    """
+    repository = repository or database.get_repository()
+    with repository.connect() as conn:
+        cursor = conn.cursor()
+        # Lock before checking open POs so two windows cannot order the same items
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(
+            '''
+            SELECT i.name, i.stock, i.low_stock, i.purchase_price, i.currency, i.supplier_id
+            FROM inventory i
+            WHERE i.stock <= i.low_stock
+              AND i.name_key NOT IN (
+                  SELECT normalize_name(l.item_name)
+                  FROM purchase_order_lines l
+                  JOIN purchase_orders p ON p.id = l.po_id
+                  WHERE p.status = 'OPEN'
+              )
+            ORDER BY i.supplier_id, i.name
+            '''
+        )
+        lines_by_supplier = {}
+        for name, stock, low_stock, purchase_price, currency, supplier_id in cursor.fetchall():
+            quantity = max(low_stock * order_up_to_factor - stock, 1)
+            lines_by_supplier.setdefault(supplier_id, []).append((name, quantity, purchase_price, currency))
+
+        po_ids = []
+        created_at = _now()
+        for supplier_id, lines in lines_by_supplier.items():
+            cursor.execute(
+                "INSERT INTO purchase_orders (supplier_id, status, created_at) VALUES (?, 'OPEN', ?)",
+                (supplier_id, created_at)
+            )
+            po_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT INTO purchase_order_lines (po_id, item_name, quantity, unit_cost, currency) VALUES (?, ?, ?, ?, ?)",
+                [(po_id, *line) for line in lines]
+            )
+            po_ids.append(po_id)
+        conn.commit()
+    return po_ids
+
+
+def fetch_purchase_orders(status=None, repository=None):
+    """Returns (id, supplier, status, created_at, line_count, total_cost) rows, newest first.
+
+    The total is converted to the base currency, and is None when a line's currency has
+    no exchange rate loaded.
+    """
+    repository = repository or database.get_repository()
+    base_currency = repository.get_base_currency()
+    query = (
+        f'''
+        {RATES_CTE}
+        SELECT p.id, s.name, p.status, p.created_at, COUNT(l.id),
+               CASE WHEN COUNT(l.id) = COUNT(r.rate)
+                    THEN COALESCE(SUM(l.quantity * l.unit_cost * r.rate), 0.0) END
+        FROM purchase_orders p
+        JOIN suppliers s ON s.id = p.supplier_id
+        LEFT JOIN purchase_order_lines l ON l.po_id = p.id
+        LEFT JOIN rates r ON r.currency = l.currency
+        '''
+    )
+    params = (base_currency, base_currency)
+    if status:
+        query += " WHERE p.status = ?"
+        params += (status,)
+    query += " GROUP BY p.id ORDER BY p.id DESC"
+    return repository.execute_query(query, params, fetch='all')
+
+
+def fetch_purchase_order_lines(po_id, repository=None):
+    """Returns (item_name, quantity, unit_cost, currency, line_cost) rows in the order they were added."""
+    repository = repository or database.get_repository()
+    return repository.execute_query(
+        "SELECT item_name, quantity, unit_cost, currency, quantity * unit_cost FROM purchase_order_lines WHERE po_id = ? ORDER BY id",
+        (po_id,), fetch='all'
+    )
+
+
+def receive_purchase_order(po_id, repository=None):
+    """Posts every line of an open PO to stock in a single transaction.
+
+    Stock levels and weighted-average purchase prices are updated for all lines at once,
+    and the history log and stock movements are written in bulk. Lines are matched to
+    items by normalized name and their costs converted to the item's currency. Items
+    that no longer exist are recreated under the PO's supplier, in the currency of
+    their first line. Returns a (success, message) tuple.
+    """
+    repository = repository or database.get_repository()
+    rates = repository.fetch_exchange_rates()
+    with repository.connect() as conn:
+        cursor = conn.cursor()
+        # Take the write lock up front so no other window can change stock mid-receipt
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(
+            '''
+            SELECT p.status, s.name
+            FROM purchase_orders p JOIN suppliers s ON s.id = p.supplier_id
+            WHERE p.id = ?
+            ''',
+            (po_id,)
+        )
+        po = cursor.fetchone()
+        if po is None:
+            conn.rollback()
+            return (False, f"Purchase order #{po_id} does not exist.")
+        status, supplier = po
+        if status != 'OPEN':
+            conn.rollback()
+            return (False, f"Purchase order #{po_id} is already {status.lower()}.")
+
+        cursor.execute(
+            '''
+            SELECT normalize_name(l.item_name), COALESCE(i.name, l.item_name), l.quantity, l.unit_cost,
+                   l.currency, i.stock, i.purchase_price, i.currency
+            FROM purchase_order_lines l
+            LEFT JOIN inventory i ON i.name_key = normalize_name(l.item_name)
+            WHERE l.po_id = ?
+            ORDER BY l.id
+            ''',
+            (po_id,)
+        )
+        received = {}
+        for row in cursor.fetchall():
+            key, name, quantity, unit_cost, line_currency, current_stock, current_avg_price, item_currency = row
+            item = received.setdefault(
+                key, [name, 0, 0.0, current_stock, current_avg_price, item_currency or line_currency]
+            )
+            unit_cost = pricing.convert(unit_cost, line_currency, item[5], rates, repository)
+            if unit_cost is None:
+                conn.rollback()
+                return (False, f"No exchange rate loaded to convert {line_currency} to {item[5]} for {name}.")
+            item[1] += quantity
+            item[2] += quantity * unit_cost
+
+        updates, new_items, history, movements = [], [], [], []
+        timestamp = _now()
+        for name, quantity, line_cost, current_stock, current_avg_price, currency in received.values():
+            unit_cost = line_cost / quantity if quantity else 0.0
+            if current_stock is None:
+                new_items.append((
+                    name, quantity, 1, unit_cost, unit_cost, supplier, 'N/A', currency,
+                    database.normalize_name(name)
+                ))
+                history.append((timestamp, name, 'CREATED', f"Item created from PO #{po_id} with stock {quantity}."))
+            else:
+                new_stock = current_stock + quantity
+                new_avg_price = (
+                    ((current_stock * current_avg_price) + line_cost) / new_stock
+                    if new_stock else current_avg_price
+                )
+                updates.append((new_stock, new_avg_price, name))
+                history.append((
+                    timestamp, name, 'STOCK ADDED',
+                    f"{quantity} units received on PO #{po_id}. Stock: {current_stock} -> {new_stock}."
+                ))
+            movements.append((timestamp, name, 'RECEIPT', quantity, unit_cost, 0.0))
+
+        cursor.executemany(
+            "UPDATE inventory SET stock = ?, purchase_price = ? WHERE name = ?", updates
+        )
+        cursor.executemany(
+            "INSERT INTO inventory (name, stock, low_stock, purchase_price, sale_price, supplier, location, currency, name_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            new_items
+        )
+        cursor.executemany(
+            "INSERT INTO history_log (timestamp, item_name, action, details) VALUES (?, ?, ?, ?)",
+            history
+        )
+        cursor.executemany(
+            "INSERT INTO stock_movements (timestamp, item_name, kind, quantity, unit_cost, unit_price) VALUES (?, ?, ?, ?, ?, ?)",
+            movements
+        )
+        cursor.execute(
+            "UPDATE purchase_orders SET status = 'RECEIVED', received_at = ? WHERE id = ?",
+            (timestamp, po_id)
+        )
+        conn.commit()
+
+    return (True, f"Received {len(received)} items on purchase order #{po_id}.")
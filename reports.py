@@ -0,0 +1,286 @@
+# File: reports.py
+import argparse
+from datetime import date, timedelta
+import database
+from storage import REPORT_WATERMARK_KEY as WATERMARK_KEY
+
+GROUP_COLUMNS = {
+    'item': "d.item_name",
+    'supplier': "COALESCE(i.supplier, '')",
+    'location': "COALESCE(i.location, 'N/A')",
+}
+
+# Exchange rates with the base currency pinned at 1.0. Report amounts are converted to the
+# base currency through it; amounts in a currency without a loaded rate are left out.
+RATES_CTE = '''
+    WITH rates (currency, rate) AS (
+        SELECT currency, rate FROM exchange_rates WHERE currency != ?
+        UNION ALL SELECT ?, 1.0
+    )
+'''
+
+
+def report_window(days=30, end=None):
+    """Returns an inclusive (start, end) pair of ISO dates covering the last `days` days."""
+    end_date = date.fromisoformat(end) if end else date.today()
+    start_date = end_date - timedelta(days=days - 1)
+    return start_date.isoformat(), end_date.isoformat()
+
+
+def _window_days(start, end):
+    return (date.fromisoformat(end) - date.fromisoformat(start)).days + 1
+
+
+def refresh_reports(repository=None):
+    """Folds stock movements recorded since the last refresh into the report tables.
+
+    Returns the number of movements that were applied.
+    """
+    repository = repository or database.get_repository()
+    with repository.connect() as conn:
+        cursor = conn.cursor()
+        # Lock before reading the watermark so two refreshes cannot fold the same movements
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT value FROM settings WHERE key = ?", (WATERMARK_KEY,))
+        row = cursor.fetchone()
+        watermark = int(row[0]) if row else 0
+
+        cursor.execute("SELECT MAX(id) FROM stock_movements")
+        latest = cursor.fetchone()[0]
+        if latest is None or latest <= watermark:
+            conn.rollback()
+            return 0
+
+        cursor.execute(
+            '''
+            INSERT INTO report_daily_sales (day, item_name, currency, units_sold, revenue, cost, units_received)
+            SELECT
+                substr(timestamp, 1, 10),
+                item_name,
+                currency,
+                SUM(CASE WHEN kind = 'SALE' THEN quantity ELSE 0 END),
+                SUM(CASE WHEN kind = 'SALE' THEN quantity * unit_price ELSE 0 END),
+                SUM(CASE WHEN kind = 'SALE' THEN quantity * unit_cost ELSE 0 END),
+                SUM(CASE WHEN kind = 'RECEIPT' THEN quantity ELSE 0 END)
+            FROM stock_movements
+            WHERE id > ? AND id <= ?
+            GROUP BY 1, 2, 3
+            ON CONFLICT (day, item_name, currency) DO UPDATE SET
+                units_sold = units_sold + excluded.units_sold,
+                revenue = revenue + excluded.revenue,
+                cost = cost + excluded.cost,
+                units_received = units_received + excluded.units_received
+            ''',
+            (watermark, latest)
+        )
+        cursor.execute(
+            '''
+            INSERT INTO report_last_sale (item_name, last_sale)
+            SELECT item_name, MAX(substr(timestamp, 1, 10))
+            FROM stock_movements
+            WHERE id > ? AND id <= ? AND kind = 'SALE'
+            GROUP BY item_name
+            ON CONFLICT (item_name) DO UPDATE SET
+                last_sale = MAX(last_sale, excluded.last_sale)
+            ''',
+            (watermark, latest)
+        )
+        cursor.execute(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+            (WATERMARK_KEY, str(latest))
+        )
+        conn.commit()
+    return latest - watermark
+
+
+def margin_report(group_by='item', start=None, end=None, repository=None):
+    """Returns (group, units_sold, revenue, cost, margin, margin_pct) rows for the window.
+
+    Amounts are in the base currency.
+    """
+    if group_by not in GROUP_COLUMNS:
+        raise ValueError(f"Cannot group margin report by '{group_by}'.")
+    if not start or not end:
+        start, end = report_window()
+    repository = repository or database.get_repository()
+    refresh_reports(repository)
+
+    key = GROUP_COLUMNS[group_by]
+    base_currency = repository.get_base_currency()
+    return repository.execute_query(
+        f'''
+        {RATES_CTE}
+        SELECT
+            {key} AS grp,
+            SUM(d.units_sold),
+            SUM(d.revenue),
+            SUM(d.cost),
+            SUM(d.revenue) - SUM(d.cost) AS margin,
+            CASE WHEN SUM(d.revenue) > 0
+                 THEN 100.0 * (SUM(d.revenue) - SUM(d.cost)) / SUM(d.revenue) END
+        FROM (
+            SELECT s.item_name, s.units_sold, s.revenue * r.rate AS revenue, s.cost * r.rate AS cost
+            FROM report_daily_sales s
+            JOIN rates r ON r.currency = s.currency
+            WHERE s.day BETWEEN ? AND ? AND s.units_sold > 0
+        ) d
+        LEFT JOIN inventory i ON i.name = d.item_name
+        GROUP BY grp
+        ORDER BY margin DESC
+        ''',
+        (base_currency, base_currency, start, end), fetch='all'
+    )
+
+
+def turnover_report(start=None, end=None, repository=None):
+    """Returns (name, units_sold, cogs, stock, stock_value, turnover, days_of_stock) per item.
+
+    Turnover is cost of goods sold over the window divided by the current stock value;
+    days-of-stock is the current stock divided by the average daily units sold.
+    Both are None when the denominator is zero. Amounts are in the base currency, and
+    stock value is None for items in a currency without a loaded rate.
+    """
+    if not start or not end:
+        start, end = report_window()
+    repository = repository or database.get_repository()
+    refresh_reports(repository)
+
+    window_days = _window_days(start, end)
+    base_currency = repository.get_base_currency()
+    return repository.execute_query(
+        f'''
+        {RATES_CTE}
+        SELECT
+            i.name,
+            COALESCE(s.units_sold, 0),
+            COALESCE(s.cogs, 0.0),
+            i.stock,
+            i.stock * i.purchase_price * r.rate AS stock_value,
+            CASE WHEN i.stock * i.purchase_price * r.rate > 0
+                 THEN COALESCE(s.cogs, 0.0) / (i.stock * i.purchase_price * r.rate) END,
+            CASE WHEN s.units_sold > 0
+                 THEN i.stock * ? / s.units_sold END
+        FROM inventory i
+        LEFT JOIN rates r ON r.currency = i.currency
+        LEFT JOIN (
+            SELECT d.item_name, SUM(d.units_sold) AS units_sold, SUM(d.cost * dr.rate) AS cogs
+            FROM report_daily_sales d
+            JOIN rates dr ON dr.currency = d.currency
+            WHERE d.day BETWEEN ? AND ? AND d.units_sold > 0
+            GROUP BY d.item_name
+        ) s ON s.item_name = i.name
+        ORDER BY 6 DESC, i.name
+        ''',
+        (base_currency, base_currency, float(window_days), start, end), fetch='all'
+    )
+
+
+def dead_stock_report(days=90, as_of=None, repository=None):
+    """Returns (name, stock, stock_value, last_sale) for stocked items with no sale in `days` days.
+
+    Stock value is in the base currency.
+    """
+    cutoff, _ = report_window(days, as_of)
+    repository = repository or database.get_repository()
+    refresh_reports(repository)
+
+    base_currency = repository.get_base_currency()
+    return repository.execute_query(
+        f'''
+        {RATES_CTE}
+        SELECT i.name, i.stock, i.stock * i.purchase_price * r.rate AS stock_value, s.last_sale
+        FROM inventory i
+        LEFT JOIN rates r ON r.currency = i.currency
+        LEFT JOIN report_last_sale s ON s.item_name = i.name
+        WHERE i.stock > 0 AND (s.last_sale IS NULL OR s.last_sale < ?)
+        ORDER BY stock_value DESC
+        ''',
+        (base_currency, base_currency, cutoff), fetch='all'
+    )
+
+
+def unconverted_currencies(repository=None):
+    """Returns the currencies of stock or sales that the reports leave out for lack of a rate."""
+    repository = repository or database.get_repository()
+    refresh_reports(repository)
+    rows = repository.execute_query(
+        '''
+        SELECT DISTINCT currency FROM report_daily_sales
+        WHERE currency != ? AND currency NOT IN (SELECT currency FROM exchange_rates)
+        ''',
+        (repository.get_base_currency(),), fetch='all'
+    )
+    return sorted({currency for (currency,) in rows} | set(repository.fetch_unconverted_currencies()))
+
+
+def format_table(headers, rows):
+    def cell(value):
+        if value is None:
+            return "-"
+        if isinstance(value, float):
+            return f"{value:,.2f}"
+        return str(value)
+
+    text_rows = [[cell(value) for value in row] for row in rows]
+    widths = [
+        max([len(header)] + [len(row[i]) for row in text_rows])
+        for i, header in enumerate(headers)
+    ]
+    lines = [
+        "  ".join(header.ljust(width) for header, width in zip(headers, widths)),
+        "  ".join("-" * width for width in widths),
+    ]
+    for row in text_rows:
+        lines.append("  ".join(value.rjust(width) if i else value.ljust(width)
+                               for i, (value, width) in enumerate(zip(row, widths))))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inventree profit and stock reports.")
+    parser.add_argument("--db", default=database.DB_FILE, help="Path to the Inventree database.")
+    subparsers = parser.add_subparsers(dest="report", required=True)
+
+    margin = subparsers.add_parser("margin", help="Margin by item, supplier or location.")
+    margin.add_argument("--by", choices=sorted(GROUP_COLUMNS), default="item")
+    turnover = subparsers.add_parser("turnover", help="Inventory turnover and days of stock.")
+    for sub in (margin, turnover):
+        sub.add_argument("--days", type=int, default=30, help="Length of the report window.")
+        sub.add_argument("--end", help="Last day of the window (YYYY-MM-DD), defaults to today.")
+        sub.add_argument("--start", help="First day of the window, overrides --days.")
+
+    dead = subparsers.add_parser("dead-stock", help="Stocked items with no sales in N days.")
+    dead.add_argument("--days", type=int, default=90)
+
+    args = parser.parse_args(argv)
+    repository = database.SQLiteRepository(args.db)
+    repository.setup_database()
+
+    missing = unconverted_currencies(repository)
+    print(f"Amounts in {repository.get_base_currency()}.")
+    if missing:
+        print(f"Left out, no exchange rate loaded: {', '.join(missing)}.")
+    print()
+
+    if args.report == "dead-stock":
+        rows = dead_stock_report(args.days, repository=repository)
+        print(format_table(["Item", "Stock", "Stock Value", "Last Sale"], rows))
+        return
+
+    start, end = report_window(args.days, args.end)
+    start = args.start or start
+    print(f"Report window: {start} to {end}\n")
+    if args.report == "margin":
+        rows = margin_report(args.by, start, end, repository)
+        print(format_table(
+            [args.by.title(), "Units Sold", "Revenue", "Cost", "Margin", "Margin %"], rows
+        ))
+    else:
+        rows = turnover_report(start, end, repository)
+        print(format_table(
+            ["Item", "Units Sold", "COGS", "Stock", "Stock Value", "Turnover", "Days of Stock"], rows
+        ))
+
+
+if __name__ == "__main__":
+    main()
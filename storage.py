@@ -0,0 +1,1104 @@
+# File: storage.py
+import bisect
+import itertools
+import sqlite3
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+INVENTORY_COLUMNS = (
+    'name', 'stock', 'low_stock', 'purchase_price', 'sale_price', 'supplier', 'location', 'currency'
+)
+
+DEFAULT_CURRENCY = "INR"
+UNASSIGNED_SUPPLIER = "Unassigned"
+REPORT_WATERMARK_KEY = "report_movement_watermark"
+
+
+def normalize_name(name):
+    """Returns the comparison key for an item name: case-folded with whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+
+class Repository(ABC):
+    """Storage interface for the inventory, history, settings and change feed.
+
+    Rows are plain tuples in the same column order for every backend, so the app and
+    tests can swap engines freely. Backends that can run raw SQL set `supports_sql`,
+    which the reporting and purchasing modules require.
+    """
+
+    supports_sql = False
+
+    def connect(self):
+        raise NotImplementedError(f"{type(self).__name__} does not support SQL connections.")
+
+    def execute_query(self, query, params=(), fetch=None):
+        raise NotImplementedError(f"{type(self).__name__} does not support SQL queries.")
+
+    @abstractmethod
+    def setup_database(self):
+        ...
+
+    @abstractmethod
+    def log_change(self, item_name, action, details=""):
+        ...
+
+    @abstractmethod
+    def log_movement(self, item_name, kind, quantity, unit_cost=0.0, unit_price=0.0):
+        ...
+
+    @abstractmethod
+    def log_movements_many(self, movements):
+        ...
+
+    @abstractmethod
+    def get_setting(self, key):
+        ...
+
+    @abstractmethod
+    def save_setting(self, key, value):
+        ...
+
+    @abstractmethod
+    def fetch_inventory(self, sort_column, sort_direction, search_query=""):
+        ...
+
+    @abstractmethod
+    def fetch_item_by_name(self, name):
+        ...
+
+    @abstractmethod
+    def fetch_item_by_key(self, name):
+        ...
+
+    @abstractmethod
+    def fetch_name_keys(self):
+        ...
+
+    @abstractmethod
+    def insert_new_item(self, values):
+        ...
+
+    @abstractmethod
+    def insert_many_items(self, items_to_add):
+        ...
+
+    @abstractmethod
+    def add_stock_to_item(self, name, new_total_stock, new_average_price):
+        ...
+
+    @abstractmethod
+    def update_item_details(self, name, stock, low_stock, purchase_price, sale_price, supplier, location, currency):
+        ...
+
+    @abstractmethod
+    def update_stock_level(self, name, new_stock):
+        ...
+
+    @abstractmethod
+    def sell_stock(self, name, quantity):
+        ...
+
+    @abstractmethod
+    def delete_item_by_name(self, name):
+        ...
+
+    @abstractmethod
+    def fetch_data_version(self):
+        ...
+
+    @abstractmethod
+    def fetch_change_sequence(self):
+        ...
+
+    @abstractmethod
+    def fetch_changes_since(self, seq):
+        ...
+
+    @abstractmethod
+    def fetch_history_log(self):
+        ...
+
+    @abstractmethod
+    def fetch_dashboard_stats(self):
+        ...
+
+    @abstractmethod
+    def fetch_low_stock_for_email(self):
+        ...
+
+    def get_base_currency(self):
+        return self.get_setting("base_currency") or DEFAULT_CURRENCY
+
+    def set_base_currency(self, currency):
+        """Makes `currency` the base currency and restates every exchange rate against it.
+
+        Rates are stored as the base-currency value of one unit, so the change is refused
+        until a rate for the new base is loaded. Returns a (success, message) tuple.
+        """
+        currency = currency.strip().upper()
+        if currency == self.get_base_currency():
+            return (True, f"Base currency is already {currency}.")
+        rates = self.fetch_exchange_rates()
+        if currency not in rates:
+            return (False, f"Load an exchange rate for {currency} before making it the base currency.")
+        new_base_rate = rates[currency]
+        self.save_exchange_rates(
+            {code: rate / new_base_rate for code, rate in rates.items()}, base_currency=currency
+        )
+        return (True, f"Base currency changed to {currency}; exchange rates restated.")
+
+    @abstractmethod
+    def save_exchange_rates(self, rates, base_currency=None):
+        ...
+
+    @abstractmethod
+    def fetch_exchange_rates(self):
+        ...
+
+    @abstractmethod
+    def fetch_valuation_by_currency(self):
+        ...
+
+    @abstractmethod
+    def fetch_unconverted_currencies(self):
+        ...
+
+    @abstractmethod
+    def fetch_price_history(self, name):
+        ...
+
+    @abstractmethod
+    def fetch_price_as_of(self, name, when):
+        ...
+
+
+class SQLiteRepository(Repository):
+    """Stores everything in a SQLite database file."""
+
+    supports_sql = True
+    uri = False
+
+    def __init__(self, path):
+        self.path = path
+        self._watch_connection = None
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, uri=self.uri)
+        # Lets SQL match raw names against the name_key column
+        conn.create_function("normalize_name", 1, normalize_name, deterministic=True)
+        return conn
+
+    def fetch_data_version(self):
+        """Returns a number that changes whenever another connection commits to the database.
+
+        Reads PRAGMA data_version on a long-lived connection, which needs no disk access, so
+        it is cheap enough to poll on a timer.
+        """
+        if self._watch_connection is None:
+            self._watch_connection = self.connect()
+        return self._watch_connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def execute_query(self, query, params=(), fetch=None):
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            conn.commit()
+            if fetch == 'one':
+                return cursor.fetchone()
+            if fetch == 'all':
+                return cursor.fetchall()
+
+    def setup_database(self):
+        self.execute_query(
+            '''
+            CREATE TABLE IF NOT EXISTS inventory (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                stock INTEGER NOT NULL,
+                low_stock INTEGER NOT NULL,
+                purchase_price REAL DEFAULT 0.0,
+                sale_price REAL DEFAULT 0.0,
+                supplier TEXT DEFAULT '',
+                location TEXT NOT NULL DEFAULT ''
+            )
+            '''
+        )
+        self.execute_query(
+            '''
+            CREATE TABLE IF NOT EXISTS history_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                item_name TEXT NOT NULL,
+                action TEXT NOT NULL,
+                details TEXT
+            )
+            '''
+        )
+        self.execute_query(
+            "CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY NOT NULL, value TEXT)"
+        )
+        self.execute_query(
+            '''
+            CREATE TABLE IF NOT EXISTS stock_movements (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                item_name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                unit_cost REAL DEFAULT 0.0,
+                unit_price REAL DEFAULT 0.0
+            )
+            '''
+        )
+        self.execute_query(
+            "CREATE INDEX IF NOT EXISTS idx_movements_item_time ON stock_movements (item_name, timestamp)"
+        )
+        # Materialized rollups of stock_movements, maintained by reports.refresh_reports().
+        # They are only a cache, so a copy from before amounts were split by currency is
+        # dropped and rebuilt from the movements on the next refresh.
+        rollup_columns = [row[1] for row in self.execute_query("PRAGMA table_info(report_daily_sales)", fetch='all')]
+        if rollup_columns and 'currency' not in rollup_columns:
+            self.execute_query("DROP TABLE report_daily_sales")
+            self.execute_query("DELETE FROM settings WHERE key = ?", (REPORT_WATERMARK_KEY,))
+        self.execute_query(
+            '''
+            CREATE TABLE IF NOT EXISTS report_daily_sales (
+                day TEXT NOT NULL,
+                item_name TEXT NOT NULL,
+                currency TEXT NOT NULL,
+                units_sold INTEGER NOT NULL DEFAULT 0,
+                revenue REAL NOT NULL DEFAULT 0.0,
+                cost REAL NOT NULL DEFAULT 0.0,
+                units_received INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, item_name, currency)
+            ) WITHOUT ROWID
+            '''
+        )
+        self.execute_query(
+            "CREATE TABLE IF NOT EXISTS report_last_sale (item_name TEXT PRIMARY KEY NOT NULL, last_sale TEXT NOT NULL)"
+        )
+        self.execute_query(
+            '''
+            CREATE TABLE IF NOT EXISTS suppliers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE
+            )
+            '''
+        )
+        self.execute_query(
+            '''
+            CREATE TABLE IF NOT EXISTS purchase_orders (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                supplier_id INTEGER NOT NULL REFERENCES suppliers (id),
+                status TEXT NOT NULL DEFAULT 'OPEN',
+                created_at TEXT NOT NULL,
+                received_at TEXT
+            )
+            '''
+        )
+        self.execute_query(
+            f'''
+            CREATE TABLE IF NOT EXISTS purchase_order_lines (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                po_id INTEGER NOT NULL REFERENCES purchase_orders (id),
+                item_name TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                unit_cost REAL NOT NULL DEFAULT 0.0,
+                currency TEXT NOT NULL DEFAULT '{DEFAULT_CURRENCY}'
+            )
+            '''
+        )
+        self.execute_query(
+            "CREATE INDEX IF NOT EXISTS idx_po_lines_po ON purchase_order_lines (po_id)"
+        )
+        self.execute_query(
+            "CREATE INDEX IF NOT EXISTS idx_po_status ON purchase_orders (status)"
+        )
+        try:
+            self.execute_query(
+                "ALTER TABLE inventory ADD COLUMN supplier_id INTEGER REFERENCES suppliers (id)"
+            )
+        except sqlite3.OperationalError:
+            pass
+        # The item form takes the supplier as free text; these triggers file each name in
+        # the suppliers table and link the item to it, whichever code path wrote the row.
+        supplier_name = f"COALESCE(NULLIF(trim(NEW.supplier), ''), '{UNASSIGNED_SUPPLIER}')"
+        link_supplier = f'''
+            BEGIN
+                INSERT OR IGNORE INTO suppliers (name) VALUES ({supplier_name});
+                UPDATE inventory SET supplier_id = (SELECT id FROM suppliers WHERE name = {supplier_name})
+                WHERE id = NEW.id;
+            END
+        '''
+        self.execute_query(
+            "CREATE TRIGGER IF NOT EXISTS inventory_supplier_insert AFTER INSERT ON inventory" + link_supplier
+        )
+        self.execute_query(
+            "CREATE TRIGGER IF NOT EXISTS inventory_supplier_update AFTER UPDATE OF supplier ON inventory "
+            "WHEN OLD.supplier IS NOT NEW.supplier" + link_supplier
+        )
+        with self.connect() as conn:
+            unlinked_name = f"COALESCE(NULLIF(trim(inventory.supplier), ''), '{UNASSIGNED_SUPPLIER}')"
+            conn.execute(
+                f"INSERT OR IGNORE INTO suppliers (name) SELECT DISTINCT {unlinked_name} FROM inventory WHERE supplier_id IS NULL"
+            )
+            conn.execute(
+                f"UPDATE inventory SET supplier_id = (SELECT id FROM suppliers WHERE name = {unlinked_name}) WHERE supplier_id IS NULL"
+            )
+            conn.commit()
+        self.execute_query("CREATE INDEX IF NOT EXISTS idx_inventory_supplier_id ON inventory (supplier_id)")
+        try:
+            self.execute_query(
+                "ALTER TABLE inventory ADD COLUMN location TEXT NOT NULL DEFAULT 'N/A'"
+            )
+        except sqlite3.OperationalError:
+            pass
+        try:
+            self.execute_query("ALTER TABLE inventory ADD COLUMN name_key TEXT")
+        except sqlite3.OperationalError:
+            pass
+        with self.connect() as conn:
+            missing_keys = conn.execute("SELECT id, name FROM inventory WHERE name_key IS NULL").fetchall()
+            conn.executemany(
+                "UPDATE inventory SET name_key = ? WHERE id = ?",
+                [(normalize_name(name), item_id) for item_id, name in missing_keys]
+            )
+            conn.commit()
+        self.execute_query("CREATE INDEX IF NOT EXISTS idx_inventory_name_key ON inventory (name_key)")
+        # Change feed: one row per item holding the sequence number of its latest change.
+        # The triggers cover every writer, so other windows can fetch just the changed rows.
+        self.execute_query(
+            '''
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_name TEXT NOT NULL UNIQUE,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+            '''
+        )
+        self.execute_query(
+            '''
+            CREATE TRIGGER IF NOT EXISTS inventory_change_insert AFTER INSERT ON inventory
+            BEGIN
+                INSERT OR REPLACE INTO change_log (item_name, deleted) VALUES (NEW.name, 0);
+            END
+            '''
+        )
+        self.execute_query(
+            '''
+            CREATE TRIGGER IF NOT EXISTS inventory_change_update AFTER UPDATE ON inventory
+            BEGIN
+                INSERT OR REPLACE INTO change_log (item_name, deleted)
+                    SELECT OLD.name, 1 WHERE OLD.name != NEW.name;
+                INSERT OR REPLACE INTO change_log (item_name, deleted) VALUES (NEW.name, 0);
+            END
+            '''
+        )
+        self.execute_query(
+            '''
+            CREATE TRIGGER IF NOT EXISTS inventory_change_delete AFTER DELETE ON inventory
+            BEGIN
+                INSERT OR REPLACE INTO change_log (item_name, deleted) VALUES (OLD.name, 1);
+            END
+            '''
+        )
+        try:
+            self.execute_query(
+                f"ALTER TABLE inventory ADD COLUMN currency TEXT NOT NULL DEFAULT '{DEFAULT_CURRENCY}'"
+            )
+        except sqlite3.OperationalError:
+            pass
+        # Unit costs on PO lines are in the currency they were ordered in; older lines
+        # take their item's currency, or the base currency if the item is gone.
+        try:
+            self.execute_query(
+                f"ALTER TABLE purchase_order_lines ADD COLUMN currency TEXT NOT NULL DEFAULT '{DEFAULT_CURRENCY}'"
+            )
+        except sqlite3.OperationalError:
+            pass
+        else:
+            self.execute_query(
+                '''
+                UPDATE purchase_order_lines SET currency = COALESCE(
+                    (SELECT currency FROM inventory WHERE name_key = normalize_name(item_name)),
+                    (SELECT NULLIF(value, '') FROM settings WHERE key = 'base_currency'),
+                    currency
+                )
+                '''
+            )
+        self.execute_query(
+            "CREATE TABLE IF NOT EXISTS exchange_rates (currency TEXT PRIMARY KEY NOT NULL, rate REAL NOT NULL)"
+        )
+        # Movement amounts are in the item's currency at the time; the trigger stamps it on
+        # every writer's rows, falling back to the base currency for deleted items.
+        try:
+            self.execute_query("ALTER TABLE stock_movements ADD COLUMN currency TEXT")
+        except sqlite3.OperationalError:
+            pass
+        movement_currency = f'''
+            COALESCE(
+                (SELECT currency FROM inventory WHERE name = {{item_name}}),
+                (SELECT NULLIF(value, '') FROM settings WHERE key = 'base_currency'),
+                '{DEFAULT_CURRENCY}'
+            )
+        '''
+        self.execute_query(
+            f'''
+            CREATE TRIGGER IF NOT EXISTS stock_movement_currency AFTER INSERT ON stock_movements
+            WHEN NEW.currency IS NULL
+            BEGIN
+                UPDATE stock_movements SET currency = {movement_currency.format(item_name="NEW.item_name")}
+                WHERE id = NEW.id;
+            END
+            '''
+        )
+        self.execute_query(
+            f"UPDATE stock_movements SET currency = {movement_currency.format(item_name='stock_movements.item_name')} "
+            "WHERE currency IS NULL"
+        )
+        # Price time series, clustered on (item, time) so as-of lookups are a single index seek.
+        # Times are epoch seconds; a row is written only when a price or the currency changes.
+        self.execute_query(
+            '''
+            CREATE TABLE IF NOT EXISTS price_history (
+                item_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                purchase_price REAL NOT NULL,
+                sale_price REAL NOT NULL,
+                currency TEXT NOT NULL,
+                PRIMARY KEY (item_id, ts)
+            ) WITHOUT ROWID
+            '''
+        )
+        self.execute_query(
+            '''
+            CREATE TRIGGER IF NOT EXISTS inventory_price_insert AFTER INSERT ON inventory
+            BEGIN
+                INSERT OR REPLACE INTO price_history (item_id, ts, purchase_price, sale_price, currency)
+                VALUES (NEW.id, CAST(strftime('%s', 'now') AS INTEGER), NEW.purchase_price, NEW.sale_price, NEW.currency);
+            END
+            '''
+        )
+        self.execute_query(
+            '''
+            CREATE TRIGGER IF NOT EXISTS inventory_price_update
+            AFTER UPDATE OF purchase_price, sale_price, currency ON inventory
+            WHEN OLD.purchase_price IS NOT NEW.purchase_price
+              OR OLD.sale_price IS NOT NEW.sale_price
+              OR OLD.currency IS NOT NEW.currency
+            BEGIN
+                INSERT OR REPLACE INTO price_history (item_id, ts, purchase_price, sale_price, currency)
+                VALUES (NEW.id, CAST(strftime('%s', 'now') AS INTEGER), NEW.purchase_price, NEW.sale_price, NEW.currency);
+            END
+            '''
+        )
+        self.execute_query(
+            '''
+            INSERT INTO price_history (item_id, ts, purchase_price, sale_price, currency)
+            SELECT id, CAST(strftime('%s', 'now') AS INTEGER), purchase_price, sale_price, currency
+            FROM inventory
+            WHERE id NOT IN (SELECT DISTINCT item_id FROM price_history)
+            '''
+        )
+        # Stock value per currency, kept current by triggers so the dashboard converts a
+        # handful of totals instead of every row. Rebuilt here to clear any float drift.
+        self.execute_query(
+            "CREATE TABLE IF NOT EXISTS valuation_totals (currency TEXT PRIMARY KEY NOT NULL, total_value REAL NOT NULL)"
+        )
+        self.execute_query(
+            '''
+            CREATE TRIGGER IF NOT EXISTS inventory_valuation_insert AFTER INSERT ON inventory
+            BEGIN
+                INSERT INTO valuation_totals (currency, total_value)
+                VALUES (NEW.currency, NEW.stock * NEW.purchase_price)
+                ON CONFLICT (currency) DO UPDATE SET total_value = total_value + excluded.total_value;
+            END
+            '''
+        )
+        self.execute_query(
+            '''
+            CREATE TRIGGER IF NOT EXISTS inventory_valuation_update
+            AFTER UPDATE OF stock, purchase_price, currency ON inventory
+            BEGIN
+                UPDATE valuation_totals SET total_value = total_value - OLD.stock * OLD.purchase_price
+                WHERE currency = OLD.currency;
+                INSERT INTO valuation_totals (currency, total_value)
+                VALUES (NEW.currency, NEW.stock * NEW.purchase_price)
+                ON CONFLICT (currency) DO UPDATE SET total_value = total_value + excluded.total_value;
+            END
+            '''
+        )
+        self.execute_query(
+            '''
+            CREATE TRIGGER IF NOT EXISTS inventory_valuation_delete AFTER DELETE ON inventory
+            BEGIN
+                UPDATE valuation_totals SET total_value = total_value - OLD.stock * OLD.purchase_price
+                WHERE currency = OLD.currency;
+            END
+            '''
+        )
+        with self.connect() as conn:
+            conn.execute("DELETE FROM valuation_totals")
+            conn.execute(
+                '''
+                INSERT INTO valuation_totals (currency, total_value)
+                SELECT currency, SUM(stock * purchase_price) FROM inventory GROUP BY currency
+                '''
+            )
+            conn.commit()
+        self.execute_query("CREATE INDEX IF NOT EXISTS idx_inventory_supplier ON inventory (supplier)")
+        self.execute_query("CREATE INDEX IF NOT EXISTS idx_inventory_location ON inventory (location)")
+
+    def log_change(self, item_name, action, details=""):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.execute_query(
+            "INSERT INTO history_log (timestamp, item_name, action, details) VALUES (?, ?, ?, ?)",
+            (timestamp, item_name, action, details)
+        )
+
+    def log_movement(self, item_name, kind, quantity, unit_cost=0.0, unit_price=0.0):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.execute_query(
+            "INSERT INTO stock_movements (timestamp, item_name, kind, quantity, unit_cost, unit_price) VALUES (?, ?, ?, ?, ?, ?)",
+            (timestamp, item_name, kind, quantity, unit_cost, unit_price)
+        )
+
+    def log_movements_many(self, movements):
+        """Records (item_name, kind, quantity, unit_cost, unit_price) tuples in a single transaction."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.connect() as conn:
+            conn.executemany(
+                "INSERT INTO stock_movements (timestamp, item_name, kind, quantity, unit_cost, unit_price) VALUES (?, ?, ?, ?, ?, ?)",
+                [(timestamp, *movement) for movement in movements]
+            )
+            conn.commit()
+
+    def get_setting(self, key):
+        result = self.execute_query(
+            "SELECT value FROM settings WHERE key = ?", (key,), fetch='one'
+        )
+        return result[0] if result else ""
+
+    def save_setting(self, key, value):
+        self.execute_query(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def fetch_inventory(self, sort_column, sort_direction, search_query=""):
+        query = (
+            "SELECT name, stock, low_stock, purchase_price, sale_price, supplier, location, currency FROM inventory"
+        )
+        params = ()
+        if search_query:
+            query += (
+                " WHERE name LIKE ? OR location LIKE ? OR supplier LIKE ?"
+            )
+            params = (
+                f'%{search_query}%',
+                f'%{search_query}%',
+                f'%{search_query}%'
+            )
+        query += f" ORDER BY {sort_column} {sort_direction}"
+        return self.execute_query(query, params, fetch='all')
+
+    def fetch_item_by_name(self, name):
+        return self.execute_query(
+            "SELECT id, name, stock, low_stock, purchase_price, sale_price, supplier, location, currency FROM inventory WHERE name = ?",
+            (name,), fetch='one'
+        )
+
+    def fetch_item_by_key(self, name):
+        """Looks an item up by its normalized name, so 'M8 Bolt' finds 'm8  bolt'."""
+        return self.execute_query(
+            "SELECT id, name, stock, low_stock, purchase_price, sale_price, supplier, location, currency FROM inventory WHERE name_key = ?",
+            (normalize_name(name),), fetch='one'
+        )
+
+    def fetch_name_keys(self):
+        return self.execute_query("SELECT name, name_key FROM inventory", fetch='all')
+
+    def insert_new_item(self, values):
+        if self.fetch_item_by_key(values[0]):
+            return False
+        try:
+            self.execute_query(
+                "INSERT INTO inventory (name, stock, low_stock, purchase_price, sale_price, supplier, location, currency, name_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*values, normalize_name(values[0]))
+            )
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def insert_many_items(self, items_to_add):
+        """Inserts a list of items in a single transaction."""
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT INTO inventory (name, stock, low_stock, purchase_price, sale_price, supplier, location, currency, name_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*item, normalize_name(item[0])) for item in items_to_add]
+            )
+            conn.commit()
+
+    def add_stock_to_item(self, name, new_total_stock, new_average_price):
+        self.execute_query(
+            "UPDATE inventory SET stock = ?, purchase_price = ? WHERE name = ?",
+            (new_total_stock, new_average_price, name)
+        )
+
+    def update_item_details(self, name, stock, low_stock, purchase_price, sale_price, supplier, location, currency):
+        self.execute_query(
+            "UPDATE inventory SET stock=?, low_stock=?, purchase_price=?, sale_price=?, supplier=?, location=?, currency=? WHERE name=?",
+            (stock, low_stock, purchase_price, sale_price, supplier, location, currency, name)
+        )
+
+    def delete_item_by_name(self, name):
+        self.execute_query(
+            "DELETE FROM inventory WHERE name = ?", (name,)
+        )
+
+    def fetch_change_sequence(self):
+        result = self.execute_query("SELECT MAX(seq) FROM change_log", fetch='one')
+        return result[0] or 0
+
+    def fetch_changes_since(self, seq):
+        """Returns (latest_seq, changes) for items changed after `seq`.
+
+        Each change is (name, row), where row is the item's current inventory columns in
+        fetch_inventory order, or None if the item has been deleted.
+        """
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                '''
+                SELECT c.seq, c.item_name, i.name, i.stock, i.low_stock, i.purchase_price,
+                       i.sale_price, i.supplier, i.location, i.currency
+                FROM change_log c
+                LEFT JOIN inventory i ON i.name = c.item_name AND c.deleted = 0
+                WHERE c.seq > ?
+                ORDER BY c.seq
+                ''',
+                (seq,)
+            )
+            rows = cursor.fetchall()
+
+        if not rows:
+            return seq, []
+        changes = [
+            (item_name, tuple(row) if row[0] is not None else None)
+            for _, item_name, *row in rows
+        ]
+        return rows[-1][0], changes
+
+    def fetch_history_log(self):
+        return self.execute_query(
+            "SELECT timestamp, item_name, action, details FROM history_log ORDER BY timestamp DESC",
+            fetch='all'
+        )
+
+    def fetch_dashboard_stats(self):
+        """Fetches all dashboard stats in a single database connection."""
+        with self.connect() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT COUNT(*) FROM inventory")
+            total_items = cursor.fetchone()[0]
+
+            # Converted to the base currency from the per-currency totals; currencies
+            # without a loaded exchange rate are left out
+            cursor.execute(
+                '''
+                SELECT SUM(v.total_value * CASE WHEN v.currency = ? THEN 1.0 ELSE r.rate END)
+                FROM valuation_totals v
+                LEFT JOIN exchange_rates r ON r.currency = v.currency
+                ''',
+                (self.get_base_currency(),)
+            )
+            total_value = cursor.fetchone()[0] or 0.0
+
+            cursor.execute("SELECT COUNT(*) FROM inventory WHERE stock <= low_stock")
+            low_stock_count = cursor.fetchone()[0]
+
+        return total_items, total_value, low_stock_count
+
+    def fetch_low_stock_for_email(self):
+        critical = self.execute_query("SELECT name, stock, low_stock FROM inventory WHERE stock <= low_stock", fetch='all')
+        warning = self.execute_query("SELECT name, stock, low_stock FROM inventory WHERE stock > low_stock AND stock <= low_stock * 1.1 AND low_stock > 0", fetch='all')
+        return critical, warning
+
+    def update_stock_level(self, name, new_stock):
+        self.execute_query("UPDATE inventory SET stock = ? WHERE name = ?", (new_stock, name))
+
+    def sell_stock(self, name, quantity):
+        """Records a sale of `quantity` units, but only if that many are left.
+
+        The check and the decrement are one UPDATE, so two tills selling the same item
+        cannot both take the last units, and the SALE movement and history entry are
+        written in the same transaction. Returns (old_stock, new_stock, low_stock,
+        unit_cost, unit_price), or None if the item is gone or has too little stock.
+        """
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE inventory SET stock = stock - ? WHERE name = ? AND stock >= ?",
+                (quantity, name, quantity)
+            )
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return None
+            # Still inside the write transaction, so this is the row just written
+            cursor.execute(
+                "SELECT stock, low_stock, purchase_price, sale_price FROM inventory WHERE name = ?", (name,)
+            )
+            new_stock, low_stock, unit_cost, unit_price = cursor.fetchone()
+            old_stock = new_stock + quantity
+            cursor.execute(
+                "INSERT INTO stock_movements (timestamp, item_name, kind, quantity, unit_cost, unit_price) VALUES (?, ?, 'SALE', ?, ?, ?)",
+                (timestamp, name, quantity, unit_cost, unit_price)
+            )
+            cursor.execute(
+                "INSERT INTO history_log (timestamp, item_name, action, details) VALUES (?, ?, 'SOLD', ?)",
+                (timestamp, name, f"{quantity} units sold. Stock: {old_stock} -> {new_stock}.")
+            )
+            conn.commit()
+        return old_stock, new_stock, low_stock, unit_cost, unit_price
+
+    def save_exchange_rates(self, rates, base_currency=None):
+        """Stores {currency: rate} pairs, where rate is the base-currency value of one unit.
+
+        A new `base_currency` the rates are stated against is saved in the same transaction.
+        """
+        with self.connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO exchange_rates (currency, rate) VALUES (?, ?)",
+                list(rates.items())
+            )
+            if base_currency:
+                conn.execute(
+                    "INSERT OR REPLACE INTO settings (key, value) VALUES ('base_currency', ?)",
+                    (base_currency,)
+                )
+            conn.commit()
+
+    def fetch_exchange_rates(self):
+        rates = dict(self.execute_query("SELECT currency, rate FROM exchange_rates", fetch='all'))
+        rates[self.get_base_currency()] = 1.0
+        return rates
+
+    def fetch_valuation_by_currency(self):
+        """Returns (currency, total_value) rows from the precomputed per-currency totals."""
+        return self.execute_query(
+            "SELECT currency, total_value FROM valuation_totals WHERE total_value != 0 ORDER BY currency",
+            fetch='all'
+        )
+
+    def fetch_unconverted_currencies(self):
+        """Returns the currencies holding stock value that have no exchange rate loaded."""
+        rows = self.execute_query(
+            '''
+            SELECT currency FROM valuation_totals
+            WHERE ABS(total_value) >= 0.005 AND currency != ?
+              AND currency NOT IN (SELECT currency FROM exchange_rates)
+            ORDER BY currency
+            ''',
+            (self.get_base_currency(),), fetch='all'
+        )
+        return [currency for (currency,) in rows]
+
+    def fetch_price_history(self, name):
+        """Returns (timestamp, purchase_price, sale_price, currency) rows, oldest first."""
+        return self.execute_query(
+            '''
+            SELECT datetime(h.ts, 'unixepoch', 'localtime'), h.purchase_price, h.sale_price, h.currency
+            FROM inventory i JOIN price_history h ON h.item_id = i.id
+            WHERE i.name = ?
+            ORDER BY h.ts
+            ''',
+            (name,), fetch='all'
+        )
+
+    def fetch_price_as_of(self, name, when):
+        """Returns (purchase_price, sale_price, currency) in effect at datetime `when`, or None."""
+        return self.execute_query(
+            '''
+            SELECT h.purchase_price, h.sale_price, h.currency
+            FROM price_history h
+            WHERE h.item_id = (SELECT id FROM inventory WHERE name = ?) AND h.ts <= ?
+            ORDER BY h.ts DESC
+            LIMIT 1
+            ''',
+            (name, int(when.timestamp())), fetch='one'
+        )
+
+
+class SharedMemoryRepository(SQLiteRepository):
+    """Runs the SQLite schema in a shared-cache in-memory database.
+
+    Every connection opened by the repository sees the same data, and the database lives
+    as long as the repository does, so nothing touches the disk.
+    """
+
+    uri = True
+    _counter = itertools.count(1)
+
+    def __init__(self, name=None):
+        super().__init__(f"file:{name or f'inventree-{next(self._counter)}'}?mode=memory&cache=shared")
+        # The in-memory database is dropped when its last connection closes
+        self._anchor = self.connect()
+
+
+class MemoryRepository(Repository):
+    """A pure-Python engine that keeps the inventory in dicts and sorted lists.
+
+    Items are stored by name with a dict index on the normalized name, and every
+    sortable column has a sorted list of (value, name) pairs so fetch_inventory can walk
+    rows in order without sorting. Stock value per currency is kept as running totals and
+    each item's price history as parallel time/price lists for bisect lookups. It has no
+    SQL, so reports and purchase orders are not available on it.
+    """
+
+    def __init__(self):
+        self.setup_database()
+
+    def setup_database(self):
+        if hasattr(self, '_items'):
+            return
+        self._ids = itertools.count(1)
+        self._items = {}
+        self._names_by_key = {}
+        self._sorted = {column: [] for column in INVENTORY_COLUMNS}
+        self._history = []
+        self._movements = []
+        self._settings = {}
+        # Insertion order of _changes follows the sequence, latest change last
+        self._changes = {}
+        self._change_seq = 0
+        self._data_version = 0
+        self._valuation = {}
+        self._rates = {}
+        # item id -> ([epoch seconds], [(purchase_price, sale_price, currency)])
+        self._prices = {}
+
+    def _timestamp(self):
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def _record_change(self, name, deleted=False):
+        self._change_seq += 1
+        self._changes.pop(name, None)
+        self._changes[name] = (self._change_seq, deleted)
+        self._data_version += 1
+
+    def _index(self, row):
+        for i, column in enumerate(INVENTORY_COLUMNS):
+            bisect.insort(self._sorted[column], (row[i], row[0]))
+        self._valuation[row[7]] = self._valuation.get(row[7], 0.0) + row[1] * row[3]
+
+    def _unindex(self, row):
+        for i, column in enumerate(INVENTORY_COLUMNS):
+            index = self._sorted[column]
+            del index[bisect.bisect_left(index, (row[i], row[0]))]
+        self._valuation[row[7]] -= row[1] * row[3]
+
+    def _record_price(self, item_id, row):
+        times, prices = self._prices.setdefault(item_id, ([], []))
+        now, price = int(time.time()), (row[3], row[4], row[7])
+        if times and times[-1] == now:
+            prices[-1] = price
+        else:
+            times.append(now)
+            prices.append(price)
+
+    def _store(self, values):
+        row = (
+            values[0], int(values[1]), int(values[2]), float(values[3]), float(values[4]),
+            values[5] or '', values[6], values[7]
+        )
+        key = normalize_name(row[0])
+        item_id = next(self._ids)
+        self._items[row[0]] = (item_id, row, key)
+        self._names_by_key[key] = row[0]
+        self._index(row)
+        self._record_price(item_id, row)
+        self._record_change(row[0])
+
+    def _update(self, name, **changes):
+        if name not in self._items:
+            return
+        item_id, row, key = self._items[name]
+        new_row = tuple(changes.get(column, value) for column, value in zip(INVENTORY_COLUMNS, row))
+        self._unindex(row)
+        self._items[name] = (item_id, new_row, key)
+        self._index(new_row)
+        if (row[3], row[4], row[7]) != (new_row[3], new_row[4], new_row[7]):
+            self._record_price(item_id, new_row)
+        self._record_change(name)
+
+    def log_change(self, item_name, action, details=""):
+        self._history.append((self._timestamp(), item_name, action, details))
+
+    def log_movement(self, item_name, kind, quantity, unit_cost=0.0, unit_price=0.0):
+        self._movements.append((self._timestamp(), item_name, kind, quantity, unit_cost, unit_price))
+
+    def log_movements_many(self, movements):
+        timestamp = self._timestamp()
+        self._movements.extend((timestamp, *movement) for movement in movements)
+
+    def get_setting(self, key):
+        return self._settings.get(key, "")
+
+    def save_setting(self, key, value):
+        self._settings[key] = value
+
+    def fetch_inventory(self, sort_column, sort_direction, search_query=""):
+        if sort_column not in self._sorted:
+            raise ValueError(f"Cannot sort inventory by '{sort_column}'.")
+        pairs = self._sorted[sort_column]
+        if sort_direction.lower() == "desc":
+            pairs = reversed(pairs)
+        rows = (self._items[name][1] for _, name in pairs)
+        if search_query:
+            # Same as SQL LIKE '%query%': a case-insensitive substring match
+            query = search_query.lower()
+            rows = (
+                row for row in rows
+                if query in row[0].lower() or query in row[6].lower() or query in row[5].lower()
+            )
+        return list(rows)
+
+    def fetch_item_by_name(self, name):
+        item = self._items.get(name)
+        return (item[0], *item[1]) if item else None
+
+    def fetch_item_by_key(self, name):
+        return self.fetch_item_by_name(self._names_by_key.get(normalize_name(name)))
+
+    def fetch_name_keys(self):
+        return [(row[0], key) for _, row, key in self._items.values()]
+
+    def insert_new_item(self, values):
+        if values[0] in self._items or normalize_name(values[0]) in self._names_by_key:
+            return False
+        self._store(values)
+        return True
+
+    def insert_many_items(self, items_to_add):
+        """Inserts a list of items, all or nothing, like the SQL transaction does."""
+        names = [item[0] for item in items_to_add]
+        duplicates = [name for name in names if name in self._items]
+        if duplicates or len(set(names)) != len(names):
+            raise sqlite3.IntegrityError(f"UNIQUE constraint failed: inventory.name ({(duplicates or names)[0]})")
+        for item in items_to_add:
+            self._store(item)
+
+    def add_stock_to_item(self, name, new_total_stock, new_average_price):
+        self._update(name, stock=new_total_stock, purchase_price=new_average_price)
+
+    def update_item_details(self, name, stock, low_stock, purchase_price, sale_price, supplier, location, currency):
+        self._update(
+            name, stock=stock, low_stock=low_stock, purchase_price=purchase_price,
+            sale_price=sale_price, supplier=supplier, location=location, currency=currency
+        )
+
+    def update_stock_level(self, name, new_stock):
+        self._update(name, stock=new_stock)
+
+    def sell_stock(self, name, quantity):
+        item = self._items.get(name)
+        if item is None or item[1][1] < quantity:
+            return None
+        _, old_stock, low_stock, unit_cost, unit_price, *_ = item[1]
+        new_stock = old_stock - quantity
+        self._update(name, stock=new_stock)
+        self.log_movement(name, 'SALE', quantity, unit_cost, unit_price)
+        self.log_change(name, 'SOLD', f"{quantity} units sold. Stock: {old_stock} -> {new_stock}.")
+        return old_stock, new_stock, low_stock, unit_cost, unit_price
+
+    def delete_item_by_name(self, name):
+        item = self._items.pop(name, None)
+        if item is None:
+            return
+        _, row, key = item
+        if self._names_by_key.get(key) == name:
+            del self._names_by_key[key]
+        self._unindex(row)
+        self._record_change(name, deleted=True)
+
+    def fetch_data_version(self):
+        return self._data_version
+
+    def fetch_change_sequence(self):
+        return self._change_seq
+
+    def fetch_changes_since(self, seq):
+        changes = []
+        for name, (change_seq, deleted) in reversed(self._changes.items()):
+            if change_seq <= seq:
+                break
+            row = None if deleted else self._items[name][1]
+            changes.append((name, row))
+        changes.reverse()
+        return self._change_seq if changes else seq, changes
+
+    def fetch_history_log(self):
+        return list(reversed(self._history))
+
+    def fetch_dashboard_stats(self):
+        rates = self.fetch_exchange_rates()
+        total_value = sum(
+            total * rates[currency]
+            for currency, total in self._valuation.items() if currency in rates
+        )
+        low_stock_count = sum(1 for _, row, _ in self._items.values() if row[1] <= row[2])
+        return len(self._items), total_value, low_stock_count
+
+    def fetch_low_stock_for_email(self):
+        rows = [row for _, row, _ in self._items.values()]
+        critical = [(row[0], row[1], row[2]) for row in rows if row[1] <= row[2]]
+        warning = [
+            (row[0], row[1], row[2]) for row in rows
+            if row[2] < row[1] <= row[2] * 1.1 and row[2] > 0
+        ]
+        return critical, warning
+
+    def save_exchange_rates(self, rates, base_currency=None):
+        self._rates.update(rates)
+        if base_currency:
+            self._settings["base_currency"] = base_currency
+
+    def fetch_exchange_rates(self):
+        rates = dict(self._rates)
+        rates[self.get_base_currency()] = 1.0
+        return rates
+
+    def fetch_valuation_by_currency(self):
+        return sorted(
+            (currency, total) for currency, total in self._valuation.items() if total != 0
+        )
+
+    def fetch_unconverted_currencies(self):
+        rates = self.fetch_exchange_rates()
+        return sorted(
+            currency for currency, total in self._valuation.items()
+            if abs(total) >= 0.005 and currency not in rates
+        )
+
+    def fetch_price_history(self, name):
+        item = self._items.get(name)
+        if item is None:
+            return []
+        times, prices = self._prices[item[0]]
+        return [
+            (datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S"), *price)
+            for ts, price in zip(times, prices)
+        ]
+
+    def fetch_price_as_of(self, name, when):
+        item = self._items.get(name)
+        if item is None:
+            return None
+        times, prices = self._prices[item[0]]
+        position = bisect.bisect_right(times, int(when.timestamp()))
+        return prices[position - 1] if position else None
@@ -0,0 +1,31 @@
+# File: test_matching.py
+import pytest
+import matching
+
+SIZE_VARIANTS = [
+    ("Hex Bolt M8x50", "Hex Bolt M8x40"),
+    ("Screw M3x12", "Screw M3x10"),
+    ("Resistor 1k", "Resistor 10k"),
+]
+
+
+def test_find_duplicates_keeps_the_first_of_repeated_names():
+    exact, fuzzy = matching.find_duplicates(
+        ["Widget", "Widget", "widget ", "Hex Bolt M8-40", "Gasket"],
+        ["Hex Bolt M8x40", "Spring"],
+    )
+
+    assert exact == {"widget ": "Widget"}
+    assert [(incoming, existing) for incoming, existing, _ in fuzzy] == [("Hex Bolt M8-40", "Hex Bolt M8x40")]
+
+
+@pytest.mark.parametrize("incoming, existing", SIZE_VARIANTS)
+def test_size_variants_are_not_flagged_as_duplicates(incoming, existing):
+    # Similar enough by trigrams alone, but a different size is a different item
+    assert matching.similarity(incoming, existing) >= matching.DEFAULT_THRESHOLD
+    assert matching.find_duplicates([incoming], [existing]) == ({}, [])
+
+
+def test_size_variant_does_not_hide_the_matching_size():
+    _, fuzzy = matching.find_duplicates(["Hex Bolt M8-40"], ["Hex Bolt M8x50", "Hex Bolt M8x40"])
+    assert [existing for _, existing, _ in fuzzy] == ["Hex Bolt M8x40"]
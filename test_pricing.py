@@ -0,0 +1,89 @@
+# File: test_pricing.py
+from datetime import datetime, timedelta
+import pytest
+import purchasing
+import reports
+
+
+def test_dashboard_converts_per_currency_totals(repository):
+    repository.save_exchange_rates({"USD": 80.0})
+    total_items, total_value, low_stock_count = repository.fetch_dashboard_stats()
+
+    assert (total_items, low_stock_count) == (3, 1)
+    assert total_value == pytest.approx(10 * 5.0 + 1 * 0.5 + 4 * 2.0 * 80)
+
+    repository.add_stock_to_item("Chip", 5, 3.0)
+    assert repository.fetch_dashboard_stats()[1] == pytest.approx(50.5 + 5 * 3.0 * 80)
+
+
+def test_changing_base_currency_restates_rates(repository):
+    assert repository.fetch_unconverted_currencies() == ["USD"]
+    assert not repository.set_base_currency("USD")[0]
+
+    repository.save_exchange_rates({"USD": 80.0})
+    assert repository.fetch_unconverted_currencies() == []
+    assert repository.set_base_currency("usd")[0]
+
+    assert repository.get_base_currency() == "USD"
+    assert repository.fetch_exchange_rates()["INR"] == pytest.approx(1 / 80)
+    assert repository.fetch_dashboard_stats()[1] == pytest.approx(50.5 / 80 + 4 * 2.0)
+    assert not repository.set_base_currency("EUR")[0]
+
+
+def test_price_as_of_returns_the_latest_price_in_effect(repository):
+    before = datetime.now() - timedelta(days=1)
+    repository.update_item_details("Chip", 4, 1, 2.5, 3.5, "Beta", "Shelf A", "USD")
+
+    assert repository.fetch_price_as_of("Chip", before) is None
+    assert repository.fetch_price_as_of("Chip", datetime.now() + timedelta(days=1)) == (2.5, 3.5, "USD")
+    assert repository.fetch_price_history("Chip")[-1][1:] == (2.5, 3.5, "USD")
+
+
+def test_reports_convert_amounts_to_the_base_currency(sql_repository):
+    sql_repository.log_movements_many([
+        ("Hex Bolt", "SALE", 2, 5.0, 8.0),
+        ("Chip", "SALE", 1, 2.0, 3.0),
+    ])
+    start, end = reports.report_window()
+
+    assert reports.unconverted_currencies(sql_repository) == ["USD"]
+    assert {row[0] for row in reports.margin_report("item", start, end, sql_repository)} == {"Hex Bolt"}
+
+    sql_repository.save_exchange_rates({"USD": 80.0})
+    assert reports.unconverted_currencies(sql_repository) == []
+    rows = {row[0]: row for row in reports.margin_report("supplier", start, end, sql_repository)}
+    assert rows["Beta"][2:5] == (240.0, 160.0, 80.0)
+    assert rows["Acme"][2:5] == (16.0, 10.0, 6.0)
+
+    turnover = {row[0]: row for row in reports.turnover_report(start, end, sql_repository)}
+    assert turnover["Chip"][2] == 160.0
+    assert turnover["Chip"][4] == 4 * 2.0 * 80
+
+
+def test_purchase_order_totals_are_converted_to_the_base_currency(sql_repository):
+    sql_repository.update_stock_level("Chip", 0)
+    purchasing.generate_reorder_purchase_orders(repository=sql_repository)
+    po_id, *_, total_cost = purchasing.fetch_purchase_orders(repository=sql_repository)[0]
+
+    assert purchasing.fetch_purchase_order_lines(po_id, sql_repository) == [("Chip", 2, 2.0, "USD", 4.0)]
+    assert total_cost is None
+
+    sql_repository.save_exchange_rates({"USD": 80.0})
+    assert purchasing.fetch_purchase_orders(repository=sql_repository)[0][5] == 4.0 * 80
+
+
+def test_receiving_converts_line_costs_to_the_item_currency(sql_repository):
+    po_id = purchasing.create_purchase_order(
+        "Beta", [("Hex Bolt", 10, 0.1, "usd"), ("Nut", 5, 0.2, "USD")], sql_repository
+    )
+    assert not purchasing.receive_purchase_order(po_id, sql_repository)[0]
+    assert sql_repository.fetch_item_by_name("Hex Bolt")[2] == 10
+
+    sql_repository.save_exchange_rates({"USD": 80.0})
+    assert purchasing.receive_purchase_order(po_id, sql_repository)[0]
+
+    _, _, stock, _, purchase_price, *_, currency = sql_repository.fetch_item_by_name("Hex Bolt")
+    assert (stock, currency) == (20, "INR")
+    assert purchase_price == pytest.approx((10 * 5.0 + 10 * 8.0) / 20)
+    assert sql_repository.fetch_item_by_name("Nut")[-1] == "USD"
+    assert sql_repository.fetch_item_by_name("Nut")[4] == pytest.approx(0.2)
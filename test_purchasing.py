@@ -0,0 +1,54 @@
+# File: test_purchasing.py
+import threading
+import time
+import pytest
+import purchasing
+from storage import SQLiteRepository
+
+
+def test_receiving_averages_cost_and_matches_by_name_key(sql_repository):
+    po_id = purchasing.create_purchase_order(
+        "Acme", [("hex  bolt", 10, 7.0, "INR"), ("HEX BOLT", 5, 7.0, "INR"), ("Nut", 3, 1.0, "INR")], sql_repository
+    )
+
+    assert purchasing.receive_purchase_order(po_id, sql_repository)[0]
+    assert not purchasing.receive_purchase_order(po_id, sql_repository)[0]
+
+    _, name, stock, _, purchase_price, *_ = sql_repository.fetch_item_by_key("Hex Bolt")
+    assert (name, stock) == ("Hex Bolt", 25)
+    assert purchase_price == pytest.approx((10 * 5.0 + 15 * 7.0) / 25)
+    assert sql_repository.fetch_item_by_name("Nut")[2] == 3
+
+
+def test_reorder_groups_by_supplier_and_skips_items_on_open_orders(sql_repository):
+    sql_repository.update_stock_level("Hex Bolt", 1)
+
+    po_ids = purchasing.generate_reorder_purchase_orders(repository=sql_repository)
+    orders = {row[1]: row for row in purchasing.fetch_purchase_orders(repository=sql_repository)}
+
+    assert len(po_ids) == 2
+    assert set(orders) == {"Acme", "Unassigned"}
+    assert purchasing.fetch_purchase_order_lines(orders["Acme"][0], sql_repository) == [("Hex Bolt", 3, 5.0, "INR", 15.0)]
+    assert purchasing.generate_reorder_purchase_orders(repository=sql_repository) == []
+
+
+def test_concurrent_reorders_order_each_item_once(tmp_path):
+    repository = SQLiteRepository(str(tmp_path / "inventree.db"))
+    repository.setup_database()
+    repository.insert_many_items([("Washer", 1, 5, 0.5, 1.0, "Acme", "Shelf B", "INR")])
+
+    # Hold the write lock while both windows start, so they check open POs at the same time
+    lock = repository.connect()
+    lock.execute("BEGIN IMMEDIATE")
+    threads = [
+        threading.Thread(target=purchasing.generate_reorder_purchase_orders, kwargs={'repository': repository})
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    lock.rollback()
+    for thread in threads:
+        thread.join()
+
+    assert len(purchasing.fetch_purchase_orders(repository=repository)) == 1
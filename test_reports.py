@@ -0,0 +1,49 @@
+# File: test_reports.py
+import threading
+import time
+import reports
+from storage import SQLiteRepository
+
+
+def test_reports_fold_in_only_new_movements(sql_repository):
+    sql_repository.log_movements_many([
+        ("Hex Bolt", "SALE", 2, 5.0, 8.0),
+        ("Washer", "SALE", 1, 0.5, 1.0),
+    ])
+    assert reports.refresh_reports(sql_repository) == 2
+    assert reports.refresh_reports(sql_repository) == 0
+
+    sql_repository.log_movement("Hex Bolt", "SALE", 1, 5.0, 8.0)
+    assert reports.refresh_reports(sql_repository) == 1
+
+    rows = {row[0]: row for row in reports.margin_report("item", *reports.report_window(), sql_repository)}
+    assert rows["Hex Bolt"][1:5] == (3, 24.0, 15.0, 9.0)
+    assert rows["Washer"][1:5] == (1, 1.0, 0.5, 0.5)
+
+
+def test_dead_stock_lists_items_without_recent_sales(sql_repository):
+    sql_repository.log_movement("Hex Bolt", "SALE", 1, 5.0, 8.0)
+    sql_repository.save_exchange_rates({"USD": 80.0})
+
+    rows = reports.dead_stock_report(90, repository=sql_repository)
+    assert [row[0] for row in rows] == ["Chip", "Washer"]
+
+
+def test_concurrent_refreshes_apply_each_movement_once(tmp_path):
+    repository = SQLiteRepository(str(tmp_path / "inventree.db"))
+    repository.setup_database()
+    repository.log_movements_many([("Hex Bolt", "SALE", 1, 5.0, 8.0)] * 100)
+
+    # Hold the write lock while both refreshes start, so they contend for the same watermark
+    lock = repository.connect()
+    lock.execute("BEGIN IMMEDIATE")
+    threads = [threading.Thread(target=reports.refresh_reports, args=(repository,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    lock.rollback()
+    for thread in threads:
+        thread.join()
+
+    rows = reports.margin_report("item", *reports.report_window(), repository)
+    assert rows[0][1] == 100
@@ -0,0 +1,37 @@
+# File: test_storage.py
+import sqlite3
+import pytest
+from storage import MemoryRepository, Repository
+
+
+def test_rows_have_the_same_shape_on_every_engine(repository):
+    assert repository.fetch_item_by_name("Hex Bolt")[1:] == (
+        "Hex Bolt", 10, 2, 5.0, 8.0, "Acme", "Shelf A", "INR"
+    )
+    assert repository.fetch_item_by_key("  hex   BOLT ")[1] == "Hex Bolt"
+    assert repository.fetch_item_by_name("Nut") is None
+
+    by_stock = repository.fetch_inventory("stock", "desc")
+    assert [row[0] for row in by_stock] == ["Hex Bolt", "Chip", "Washer"]
+    assert [row[0] for row in repository.fetch_inventory("name", "asc", "shelf a")] == ["Chip", "Hex Bolt"]
+
+
+def test_duplicate_names_are_rejected_the_same_way(repository):
+    assert not repository.insert_new_item(("hex  bolt", 1, 1, 1.0, 1.0, "", "Shelf A", "INR"))
+
+    with pytest.raises(sqlite3.IntegrityError):
+        repository.insert_many_items([
+            ("Nut", 1, 1, 1.0, 1.0, "", "Shelf A", "INR"),
+            ("Washer", 1, 1, 1.0, 1.0, "", "Shelf A", "INR"),
+        ])
+    assert repository.fetch_item_by_name("Nut") is None
+
+
+def test_incomplete_backend_fails_when_created():
+    class PartialRepository(Repository):
+        def fetch_inventory(self, sort_column, sort_direction, search_query=""):
+            return []
+
+    with pytest.raises(TypeError):
+        PartialRepository()
+    assert not MemoryRepository().supports_sql
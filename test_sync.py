@@ -0,0 +1,37 @@
+# File: test_sync.py
+
+
+def test_change_feed_returns_only_newer_changes(repository):
+    seq = repository.fetch_change_sequence()
+    assert repository.fetch_changes_since(seq) == (seq, [])
+
+    repository.update_stock_level("Washer", 7)
+    repository.delete_item_by_name("Chip")
+    latest, changes = repository.fetch_changes_since(seq)
+
+    assert latest > seq
+    assert changes == [
+        ("Washer", ("Washer", 7, 5, 0.5, 1.0, "", "Shelf B", "INR")),
+        ("Chip", None),
+    ]
+
+
+def test_sell_stock_never_oversells(repository):
+    assert repository.sell_stock("Hex Bolt", 6) == (10, 4, 2, 5.0, 8.0)
+    assert repository.sell_stock("Hex Bolt", 6) is None
+    assert repository.sell_stock("Hex Bolt", 4) == (4, 0, 2, 5.0, 8.0)
+    assert repository.sell_stock("Nut", 1) is None
+    assert repository.fetch_item_by_name("Hex Bolt")[2] == 0
+
+
+def test_sell_stock_records_the_sale_with_the_decrement(repository):
+    repository.sell_stock("Hex Bolt", 6)
+    repository.sell_stock("Hex Bolt", 6)
+
+    assert [row[1:] for row in repository.fetch_history_log()] == [
+        ("Hex Bolt", "SOLD", "6 units sold. Stock: 10 -> 4."),
+    ]
+    if repository.supports_sql:
+        assert repository.execute_query(
+            "SELECT item_name, kind, quantity, unit_cost, unit_price FROM stock_movements", fetch='all'
+        ) == [("Hex Bolt", "SALE", 6, 5.0, 8.0)]